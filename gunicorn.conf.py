@@ -1,10 +1,22 @@
 import os
 
+# Environment variables do not change once the master process starts, so read
+# them once and memoize parsed values.
+_ENV = os.environ.copy()
+_INT_CACHE: dict[tuple[str, int | None, int | None, bool], int | None] = {}
+
 
 def _int_env(name: str, default: int | None, *, minimum: int | None = None, allow_none: bool = False) -> int | None:
     """Best-effort integer parsing that tolerates Render-style empty values."""
 
-    raw = os.environ.get(name)
+    key = (name, default, minimum, allow_none)
+    if key not in _INT_CACHE:
+        _INT_CACHE[key] = _parse_int_env(name, default, minimum=minimum, allow_none=allow_none)
+    return _INT_CACHE[key]
+
+
+def _parse_int_env(name: str, default: int | None, *, minimum: int | None, allow_none: bool) -> int | None:
+    raw = _ENV.get(name)
     if raw is None:
         return default
 
@@ -27,18 +39,29 @@ def _int_env(name: str, default: int | None, *, minimum: int | None = None, allo
     return value
 
 
-bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
-workers = _int_env("WEB_CONCURRENCY", 1, minimum=1) or 1
-threads = _int_env("WEB_THREADS", 1, minimum=1) or 1
-# Allow long-running Demucs jobs to finish without being killed by Gunicorn.
-timeout = _int_env("WEB_TIMEOUT", 600, minimum=1) or 600
-graceful_timeout = _int_env("WEB_GRACEFUL_TIMEOUT", timeout or 600, minimum=1) or timeout or 600
+# (env var, default, minimum) for each bounded integer setting, in the order
+# they are unpacked below. A minimum guarantees a non-None result.
+_SPECS = (
+    ("WEB_CONCURRENCY", 1, 1),
+    # Tasks live in each worker's memory, so scale with threads rather than
+    # workers: more than one thread selects the gthread worker, which answers
+    # progress polls while uploads and downloads are in flight.
+    ("WEB_THREADS", 8, 1),
+    # Allow long-running Demucs jobs to finish without being killed by Gunicorn.
+    ("WEB_TIMEOUT", 600, 1),
+    ("WEB_MAX_REQUESTS_JITTER", 0, 0),
+)
+
+bind = f"0.0.0.0:{_ENV.get('PORT', '8000')}"
+workers, threads, timeout, max_requests_jitter = (
+    _int_env(name, default, minimum=minimum) for name, default, minimum in _SPECS
+)
+graceful_timeout = _int_env("WEB_GRACEFUL_TIMEOUT", timeout, minimum=1)
 # Temporary directory for workers to avoid issues on systems without /tmp permissions.
-worker_tmp_dir_candidate = os.environ.get("WORKER_TMP_DIR", "/dev/shm")
+worker_tmp_dir_candidate = _ENV.get("WORKER_TMP_DIR", "/dev/shm")
 if os.path.isdir(worker_tmp_dir_candidate):
     worker_tmp_dir = worker_tmp_dir_candidate
 # Limit the maximum requests to recycle workers periodically in long-running deployments.
 max_requests = _int_env("WEB_MAX_REQUESTS", None, allow_none=True)
 if max_requests is not None and max_requests <= 0:
     max_requests = None
-max_requests_jitter = _int_env("WEB_MAX_REQUESTS_JITTER", 0, minimum=0) or 0
@@ -13,30 +13,97 @@ Example:
 from __future__ import annotations
 
 import argparse
+import atexit
 import logging
+import logging.handlers
+import os
 import sys
-from pathlib import Path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from salsa_milk import get_version
-from salsa_milk_core import download_from_youtube, process_files
+
+
+_LOG_BUFFER_CAPACITY = 64
+_LOG_FLUSH_INTERVAL = 1.0
+
+
+def _flush_periodically(handler: logging.Handler, interval: float) -> None:
+    """Flush ``handler`` every ``interval`` seconds so quiet periods still show output."""
+    while True:
+        time.sleep(interval)
+        handler.flush()
 
 
 def configure_logging() -> logging.Logger:
     """Configure default logging for the CLI.
     
     Sets up INFO level logging with timestamps and sends output to stdout.
+    Records are buffered and written in batches: when the buffer fills, on
+    any WARNING or above, at least once a second, and at exit.
     
     Returns:
         Configured logger instance for salsa-milk.
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.StreamHandler(stream=sys.stdout)],
+    stream = logging.StreamHandler(stream=sys.stdout)
+    stream.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    buffered = logging.handlers.MemoryHandler(
+        capacity=_LOG_BUFFER_CAPACITY,
+        flushLevel=logging.WARNING,
+        target=stream,
     )
+    logging.basicConfig(level=logging.INFO, handlers=[buffered])
+
+    # ``basicConfig`` is a no-op when logging is already configured.
+    if buffered in logging.getLogger().handlers:
+        atexit.register(buffered.flush)
+        threading.Thread(
+            target=_flush_periodically,
+            args=(buffered, _LOG_FLUSH_INTERVAL),
+            name="salsa-milk-log-flush",
+            daemon=True,
+        ).start()
+
     return logging.getLogger("salsa-milk")
 
 
+class _VersionAction(argparse.Action):
+    """``--version`` action that only looks up the package version when used."""
+
+    def __init__(
+        self,
+        option_strings: list[str],
+        dest: str = argparse.SUPPRESS,
+        help: str | None = None,
+    ) -> None:
+        super().__init__(
+            option_strings=option_strings,
+            dest=dest,
+            default=argparse.SUPPRESS,
+            nargs=0,
+            help=help,
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None) -> None:
+        sys.stdout.write(f"{parser.prog} {get_version()}\n")
+        parser.exit()
+
+
+def _positive_int(value: str) -> int:
+    """Parse an argparse value that must be a positive integer."""
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+
+    return number
+
+
 def parse_args() -> argparse.Namespace:
     """Parse command-line arguments.
     
@@ -47,6 +114,8 @@ def parse_args() -> argparse.Namespace:
             - temp_dir: Temporary working directory
             - output_dir: Output directory for processed files
             - download_dir: Directory for YouTube downloads
+            - fast_remux: Whether to stream-copy vocals into MKV video outputs
+            - max_workers: Maximum concurrent ffmpeg jobs, or None for the CPU count
     """
     parser = argparse.ArgumentParser(
         description="Extract vocals from media files or YouTube URLs using Demucs.",
@@ -68,10 +137,21 @@ def parse_args() -> argparse.Namespace:
         default="/media",
         help="Directory for downloaded YouTube media (default: /media).",
     )
+    parser.add_argument(
+        "--fast-remux",
+        action="store_true",
+        help="Write video outputs as MKV with uncompressed vocals instead of "
+        "re-encoding them to AAC in an MP4.",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=_positive_int,
+        default=None,
+        help="Maximum number of ffmpeg jobs to run at once (default: CPU count).",
+    )
     parser.add_argument(
         "--version",
-        action="version",
-        version=f"%(prog)s {get_version()}",
+        action=_VersionAction,
         help="Show the Salsa Milk version and exit.",
     )
     return parser.parse_args()
@@ -84,22 +164,33 @@ def main() -> None:
     1. Parses command-line arguments
     2. Creates necessary directories
     3. Separates YouTube URLs from local files
-    4. Downloads videos from YouTube
-    5. Processes all media files
+    4. Downloads videos from YouTube, processing local files meanwhile
+    5. Processes the downloaded media files
     6. Reports results
     
     Exits with code 1 if no valid inputs are provided or processing fails.
     """
+    # A bare ``--version`` is common in scripts; answer it without building
+    # the parser. Any other combination goes through argparse as usual.
+    if sys.argv[1:] == ["--version"]:
+        sys.stdout.write(f"{os.path.basename(sys.argv[0])} {get_version()}\n")
+        sys.exit(0)
+
     logger = configure_logging()
     args = parse_args()
 
-    output_dir = Path(args.output_dir)
-    download_dir = Path(args.download_dir)
-    temp_dir = Path(args.temp_dir)
+    # Deferred so ``--help``/``--version`` and argument errors never pay for the
+    # processing stack.
+    from salsa_milk_core import (
+        ProcessingResult,
+        download_from_youtube,
+        ensure_directory,
+        process_files,
+    )
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    download_dir.mkdir(parents=True, exist_ok=True)
-    temp_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = ensure_directory(args.output_dir)
+    download_dir = ensure_directory(args.download_dir)
+    temp_dir = ensure_directory(args.temp_dir)
 
     youtube_urls = []
     local_files = []
@@ -108,28 +199,45 @@ def main() -> None:
         if item.startswith(("http://", "https://")):
             youtube_urls.append(item)
         else:
-            local_path = Path(item)
-            if local_path.exists():
-                local_files.append(str(local_path.resolve()))
-            else:
+            # One stat() both checks existence and lets realpath() run on a
+            # path known to be there.
+            try:
+                os.stat(item)
+            except OSError:
                 logger.warning("Skipping missing file: %s", item)
-
-    downloaded_files = download_from_youtube(youtube_urls, download_dir=download_dir)
-
-    all_files = local_files + downloaded_files
-
-    if not all_files:
-        logger.error("No valid input files found. Provide local files or YouTube URLs.")
-        sys.exit(1)
-
-    logger.info("Processing %s file(s)...", len(all_files))
-    results = process_files(
-        all_files,
-        model=args.model,
-        temp_dir=temp_dir,
-        output_dir=output_dir,
-        enable_progress=True,
-    )
+            else:
+                local_files.append(os.path.realpath(item))
+
+    def process(paths: list[str]) -> list[ProcessingResult]:
+        logger.info("Processing %s file(s)...", len(paths))
+        return process_files(
+            paths,
+            model=args.model,
+            temp_dir=temp_dir,
+            output_dir=output_dir,
+            enable_progress=True,
+            fast_remux=args.fast_remux,
+            max_workers=args.max_workers,
+        )
+
+    if local_files and youtube_urls:
+        # Downloads are network-bound, so the local files are separated while
+        # yt-dlp runs and the downloaded ones follow once it finishes.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            download = pool.submit(download_from_youtube, youtube_urls, download_dir=download_dir)
+            results = process(local_files)
+            downloaded_files = download.result()
+
+        if downloaded_files:
+            results += process(downloaded_files)
+    else:
+        all_files = local_files or download_from_youtube(youtube_urls, download_dir=download_dir)
+
+        if not all_files:
+            logger.error("No valid input files found. Provide local files or YouTube URLs.")
+            sys.exit(1)
+
+        results = process(all_files)
 
     if not results:
         logger.error("No files were successfully processed.")
@@ -137,9 +245,9 @@ def main() -> None:
 
     logger.info("Successfully processed %s file(s):", len(results))
     for idx, result in enumerate(results, start=1):
-        logger.info("%s. %s", idx, Path(result["output"]).name)
+        logger.info("%s. %s", idx, os.path.basename(result.output))
 
-    logger.info("Output files saved to %s", output_dir.resolve())
+    logger.info("Output files saved to %s", os.path.realpath(output_dir))
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry point
@@ -2,17 +2,29 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from importlib import metadata
 
 __all__ = ["__version__", "get_version"]
 
-try:
-    __version__ = metadata.version("salsa-milk")
-except metadata.PackageNotFoundError:  # pragma: no cover - fallback for editable installs
-    __version__ = "0.2.0"
-
 
+@lru_cache(maxsize=None)
 def get_version() -> str:
-    """Return the current Salsa Milk version string."""
+    """Return the current Salsa Milk version string.
+
+    The package metadata lookup only happens on first use and is cached for the
+    lifetime of the process.
+    """
+
+    try:
+        return metadata.version("salsa-milk")
+    except metadata.PackageNotFoundError:  # pragma: no cover - fallback for editable installs
+        return "0.2.0"
+
+
+def __getattr__(name: str) -> str:
+    """Resolve ``__version__`` lazily so importing the package stays cheap."""
 
-    return __version__
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
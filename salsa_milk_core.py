@@ -2,21 +2,48 @@
 
 from __future__ import annotations
 
-import glob
 import logging
 import os
 import re
+import selectors
 import shutil
 import subprocess
+import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Iterable, List, Sequence
-
-from tqdm import tqdm
+from typing import IO, Callable, Dict, List, Sequence
 
 
 logger = logging.getLogger("salsa-milk")
 
+# Video id from ``youtube.com/watch?v=<id>`` or ``youtu.be/<id>`` links.
+_YT_ID_RE = re.compile(r"(?:youtube\.com/watch\?v=|youtu\.be/)([A-Za-z0-9_-]+)")
+_WS_RE = re.compile(r"\s+")
+# Concurrent yt-dlp processes, and parallel fragment downloads within each.
+_YT_DLP_WORKERS = 4
+_YT_DLP_FRAGMENTS = 4
+_DEMUCS_PCT_RE = re.compile(rb"(\d{1,3})%")
+# Demucs prints this on stdout before separating each input.
+_DEMUCS_TRACK_RE = re.compile(rb"^Separating track (.+)$")
+_DEMUCS_LINE_RE = re.compile(rb"[\r\n]")
+_DEMUCS_READ_SIZE = 65536
+
+_VIDEO_EXTS = frozenset({".mp4", ".mov", ".avi", ".mkv", ".webm"})
+# Encoder for each audio output extension; anything else is written as WAV.
+_AUDIO_CODEC = {
+    ".mp3": "libmp3lame",
+    ".aac": "aac",
+    ".m4a": "aac",
+    ".ogg": "libopus",
+    ".opus": "libopus",
+    ".wav": "copy",
+}
+
 
 def _ensure_path(value: os.PathLike[str] | str) -> Path:
     """Return a Path instance for the provided value.
@@ -30,6 +57,213 @@ def _ensure_path(value: os.PathLike[str] | str) -> Path:
     return value if isinstance(value, Path) else Path(value)
 
 
+@lru_cache(maxsize=256)
+def _make_directory(path: str) -> None:
+    """Create ``path`` (and parents) once per process."""
+    os.makedirs(path, exist_ok=True)
+
+
+def ensure_directory(value: os.PathLike[str] | str) -> Path:
+    """Create a directory if needed and return it as a Path.
+    
+    Directories that were already ensured by this process are skipped without
+    touching the filesystem, so repeated calls for the same location are cheap.
+    That trusts the directory to outlive the process, so keep this for
+    long-lived top-level locations; per-run scratch directories that may be
+    wiped between runs should call ``os.makedirs`` directly.
+    
+    Args:
+        value: Path-like object or string naming the directory.
+        
+    Returns:
+        Path instance of the directory.
+    """
+    path = _ensure_path(value)
+    _make_directory(os.fspath(path))
+    return path
+
+
+def _scan_vocals(demucs_root: Path, model: str) -> Dict[str, Path]:
+    """Map every track Demucs wrote under ``demucs_root`` to its vocals stem.
+    
+    Each model directory is listed once, so lookups need no per-file probes.
+    Tracks under ``model`` take precedence over other model directories.
+    
+    Args:
+        demucs_root: Root directory passed to Demucs via ``-o``.
+        model: Demucs model that was requested.
+        
+    Returns:
+        Mapping of track name to its ``vocals.wav`` (empty if the root is missing).
+    """
+    try:
+        with os.scandir(demucs_root) as entries:
+            model_dirs = [entry for entry in entries if entry.is_dir()]
+    except FileNotFoundError:
+        return {}
+
+    # Visit the requested model last so its tracks override any alternates.
+    model_dirs.sort(key=lambda entry: entry.name == model)
+
+    vocals: Dict[str, Path] = {}
+    for model_dir in model_dirs:
+        with os.scandir(model_dir.path) as tracks:
+            for track in tracks:
+                if track.is_dir():
+                    vocals[track.name] = Path(track.path, "vocals.wav")
+    return vocals
+
+
+def _set_aside(path: Path, discard_root: Path) -> Path | None:
+    """Move ``path`` into a fresh directory under ``discard_root`` for deletion.
+    
+    Args:
+        path: Directory to get out of the way.
+        discard_root: Directory on the same filesystem to hold it.
+        
+    Returns:
+        The directory now holding ``path`` (delete it to finish the cleanup),
+        or None if ``path`` does not exist.
+    """
+    if not path.exists():
+        return None
+
+    os.makedirs(discard_root, exist_ok=True)
+    holder = Path(tempfile.mkdtemp(prefix=f"{path.name}-", dir=discard_root))
+    try:
+        os.replace(path, holder / path.name)
+    except OSError:
+        # Fall back to deleting in place if it cannot be moved.
+        shutil.rmtree(path, ignore_errors=True)
+    return holder
+
+
+def _run_quiet(cmd: List[str]) -> None:
+    """Run ``cmd`` to completion without forwarding its output.
+    
+    stdout is discarded; stderr is captured so failures can be reported.
+    
+    Args:
+        cmd: Command and arguments to execute.
+        
+    Raises:
+        subprocess.CalledProcessError: If the command exits with a non-zero
+            status; ``stderr`` holds the captured error output.
+    """
+    subprocess.run(
+        cmd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+
+
+def _describe_failure(exc: subprocess.CalledProcessError) -> str:
+    """Return ``exc`` with the last line the failing command wrote to stderr."""
+    stderr = (exc.stderr or "").strip()
+    if not stderr:
+        return str(exc)
+    return f"{exc} ({stderr.splitlines()[-1]})"
+
+
+# Inputs handed to a single Demucs process. Each run loads the model once, so
+# larger batches amortise start-up; the cap bounds temporary disk usage.
+_DEMUCS_BATCH_SIZE = 16
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessingResult:
+    """Outcome of isolating vocals from one input file.
+    
+    Attributes:
+        input: Original input file path.
+        output: Output file path with isolated vocals.
+        id: File identifier (stem name).
+    """
+
+    input: str
+    output: str
+    id: str
+
+
+# Output futures for a batch, keyed by job index.
+_PendingOutputs = Dict[int, "Future[ProcessingResult | None]"]
+
+
+class _ProgressPrinter:
+    """Minimal ``desc: done/total`` counter redrawn in place on stderr."""
+
+    def __init__(self, total: int, desc: str) -> None:
+        self.total = total
+        self.desc = desc
+        self.done = 0
+
+    def update(self, count: int = 1) -> None:
+        """Advance the counter by ``count`` files and redraw it."""
+        self.done += count
+        sys.stderr.write(f"\r{self.desc}: {self.done}/{self.total}")
+        sys.stderr.flush()
+
+    def close(self) -> None:
+        """Finish the progress line."""
+        if self.done:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+
+@dataclass
+class _FileJob:
+    """Book-keeping for one input as it moves through the pipeline stages."""
+
+    index: int
+    file_path: Path
+    file_id: str
+    has_video: bool
+    wav_path: Path
+    source: Path = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Demucs decodes most media itself; ``source`` only switches to the
+        # WAV copy when that fails.
+        self.source = self.file_path
+
+
+def _ignore_progress(*_args: object, **_kwargs: object) -> None:
+    """Progress emitter used when ``process_files`` has no callback."""
+
+
+def _plan_batches(jobs: Sequence[_FileJob]) -> List[List[_FileJob]]:
+    """Split jobs into Demucs runs of unique stems, preserving input order.
+    
+    Demucs names each output directory after the input's stem, so two inputs
+    sharing a stem must not be separated by the same process.
+    
+    Args:
+        jobs: Jobs in input order.
+        
+    Returns:
+        Consecutive batches of at most ``_DEMUCS_BATCH_SIZE`` jobs.
+    """
+    batches: List[List[_FileJob]] = []
+    current: List[_FileJob] = []
+    stems: set[str] = set()
+
+    for job in jobs:
+        if len(current) >= _DEMUCS_BATCH_SIZE or job.file_id in stems:
+            batches.append(current)
+            current = []
+            stems = set()
+        current.append(job)
+        stems.add(job.file_id)
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
 def process_files(
     input_files: Sequence[os.PathLike[str] | str],
     *,
@@ -38,29 +272,36 @@ def process_files(
     output_dir: os.PathLike[str] | str = "/output",
     enable_progress: bool = False,
     progress_callback: Callable[[str, float, str | None], None] | None = None,
-) -> List[dict]:
+    fast_remux: bool = False,
+    max_workers: int | None = None,
+) -> List[ProcessingResult]:
     """Process media files to isolate vocals using Demucs.
     
     This function handles the complete pipeline for vocal isolation:
-    1. Converts input media to WAV format
-    2. Runs Demucs AI model for source separation
-    3. Extracts vocals track
-    4. Re-encodes to appropriate output format (preserving video if present)
+    1. Runs Demucs AI model for source separation (one process per batch of
+       files), converting an input to WAV first only if Demucs cannot read it
+    2. Extracts vocals track
+    3. Re-encodes to appropriate output format (preserving video if present)
     
     Args:
         input_files: Sequence of file paths to process.
         model: Demucs model name to use (default: "htdemucs").
         temp_dir: Directory for temporary files (default: "/tmp").
         output_dir: Directory for output files (default: "/output").
-        enable_progress: Whether to show progress bar for multiple files (default: False).
+        enable_progress: Whether to show a progress counter on an interactive stderr
+            when processing multiple files (default: False).
         progress_callback: Optional callback function for progress updates.
             Called with (stage: str, fraction: float, message: str | None).
+            The reported fraction never decreases.
+        fast_remux: Write video outputs as MKV with the vocals kept as PCM, so
+            both streams are copied without re-encoding (default: False,
+            which encodes the vocals to AAC in an MP4).
+        max_workers: Maximum number of ffmpeg conversions and muxes run at once
+            (default: None, meaning the CPU count). Demucs itself runs one
+            process per batch.
             
     Returns:
-        List of dictionaries containing processing results. Each dict has:
-            - input: Original input file path
-            - output: Output file path with isolated vocals
-            - id: File identifier (stem name)
+        A ProcessingResult for each successfully processed file, in input order.
             
     Example:
         >>> results = process_files(
@@ -69,209 +310,558 @@ def process_files(
         ...     temp_dir="/tmp/work",
         ...     output_dir="/output"
         ... )
-        >>> print(results[0]["output"])
+        >>> print(results[0].output)
         /output/song_vocals.mp3
     """
     if not input_files:
         return []
 
     temp_root = _ensure_path(temp_dir)
-    output_root = _ensure_path(output_dir)
 
     temp_audio_dir = temp_root / "audio"
     demucs_root = temp_root / "demucs"
+    output_root = _ensure_path(output_dir)
+    os.makedirs(demucs_root, exist_ok=True)
+    os.makedirs(output_root, exist_ok=True)
 
-    temp_audio_dir.mkdir(parents=True, exist_ok=True)
-    demucs_root.mkdir(parents=True, exist_ok=True)
-    output_root.mkdir(parents=True, exist_ok=True)
-
-    files_iterable: Iterable[Path]
     path_inputs = [_ensure_path(path) for path in input_files]
+    total = len(path_inputs)
+    jobs = [
+        _FileJob(
+            index=index,
+            file_path=file_path,
+            file_id=file_path.stem,
+            has_video=file_path.suffix.lower() in _VIDEO_EXTS,
+            wav_path=temp_audio_dir / f"{file_path.stem}.wav",
+        )
+        for index, file_path in enumerate(path_inputs)
+    ]
+
+    furthest = 0.0
+    emit_lock = threading.Lock()
+    per_file_span = 1.0 / total
+
+    def emit(job: _FileJob, stage: str, fraction: float, message: str | None = None) -> None:
+        """Emit progress update through callback.
+        
+        Args:
+            job: File the update refers to.
+            stage: Processing stage identifier.
+            fraction: Progress fraction for this file (0.0 to 1.0).
+            message: Optional progress message.
+        """
+        nonlocal furthest
+        bounded = max(0.0, min(1.0, (job.index + fraction) * per_file_span))
+        with emit_lock:
+            furthest = max(furthest, bounded)
+            progress_callback(stage, furthest, message)
+
+    if progress_callback is None:
+        # Skip the bounds math and the lock when nobody is listening.
+        emit = _ignore_progress
+
+    # Tracks found under ``demucs_root``; rescanned after each Demucs run.
+    vocals_map: Dict[str, Path] | None = None
+
+    def locate_vocals(job: _FileJob) -> Path | None:
+        """Return the vocals Demucs produced for ``job``, if any."""
+        nonlocal vocals_map
+        if vocals_map is None:
+            vocals_map = _scan_vocals(demucs_root, model)
+        return vocals_map.get(job.file_id)
+
+    progress_bar = None
+    if enable_progress and total > 1 and sys.stderr.isatty():
+        progress_bar = _ProgressPrinter(total, "Processing files")
+
+    # One slot per input, filled by index so order never depends on which
+    # ffmpeg run finishes first.
+    results: List[ProcessingResult | None] = [None] * total
+
+    def run_batch(
+        batch: List[_FileJob], pending: _PendingOutputs, pool: ThreadPoolExecutor
+    ) -> None:
+        """Separate ``batch``, submitting each file's ffmpeg job to ``pool``."""
+        nonlocal vocals_map
+
+        for job in batch:
+            logger.info("Processing %s", job.file_path.name)
+            emit(job, "prepare", 0.02, f"Preparing {job.file_path.name}")
+
+        def submit(job: _FileJob, vocals_path: Path) -> None:
+            pending[job.index] = pool.submit(
+                _write_output, job, vocals_path, output_root, emit, fast_remux=fast_remux
+            )
 
-    if enable_progress and len(path_inputs) > 1:
-        files_iterable = tqdm(path_inputs, desc="Processing files")
-    else:
-        files_iterable = path_inputs
+        def on_track_done(job: _FileJob) -> None:
+            # Demucs saves a track's stems before announcing the next one, so
+            # the file is complete here; outputs under alternate model
+            # directories are picked up once the run has finished.
+            vocals_path = demucs_root / model / job.file_id / "vocals.wav"
+            if vocals_path.exists():
+                submit(job, vocals_path)
 
-    results: List[dict] = []
+        failed: List[_FileJob] = []
+        vocals_map = None
+        try:
+            _separate(
+                batch,
+                model=model,
+                demucs_root=demucs_root,
+                emit=emit,
+                on_track_done=on_track_done,
+            )
+        except subprocess.CalledProcessError as exc:
+            retry = [
+                job for job in batch if job.index not in pending and locate_vocals(job) is None
+            ]
+            logger.warning(
+                "Demucs could not read %s directly (%s); retrying from WAV",
+                ", ".join(job.file_path.name for job in retry),
+                exc,
+            )
+            # Conversions are independent ffmpeg runs; use the pool.
+            converted = [
+                job
+                for job, ok in zip(retry, pool.map(lambda job: _convert_to_wav(job, emit), retry))
+                if ok
+            ]
+            failed.extend(job for job in retry if job not in converted)
+            if converted:
+                vocals_map = None
+                try:
+                    _separate(
+                        converted,
+                        model=model,
+                        demucs_root=demucs_root,
+                        emit=emit,
+                        on_track_done=on_track_done,
+                    )
+                except subprocess.CalledProcessError as retry_exc:
+                    for job in converted:
+                        if job.index not in pending and locate_vocals(job) is None:
+                            logger.error("Processing failed for %s: %s", job.file_id, retry_exc)
+                            emit(job, "error", 1.0, f"Processing failed for {job.file_path.name}")
+                            failed.append(job)
+
+        for job in batch:
+            if job in failed or job.index in pending:
+                continue
+            vocals_path = locate_vocals(job)
+            if vocals_path is None:
+                logger.warning("Could not find extracted vocals for %s", job.file_id)
+                continue
+            if vocals_path.parent.parent.name != model:
+                logger.info("Found vocals at alternate path: %s", vocals_path)
+            submit(job, vocals_path)
+
+    def finish_batch(
+        batch: List[_FileJob], pending: _PendingOutputs, pool: ThreadPoolExecutor
+    ) -> None:
+        """Collect ``batch``'s outputs in order, then remove its intermediates.
+        
+        Demucs output directories are moved aside at once, so a later batch
+        can reuse their paths, and deleted on ``pool`` in the background.
+        """
+        try:
+            for job in batch:
+                future = pending.get(job.index)
+                if future is not None:
+                    results[job.index] = future.result()
+                if progress_bar is not None:
+                    progress_bar.update(1)
+        finally:
+            for job in batch:
+                if job.wav_path.exists():
+                    job.wav_path.unlink()
+
+                discarded = _set_aside(demucs_root / model / job.file_id, temp_root / "discard")
+                if discarded is not None:
+                    pool.submit(shutil.rmtree, discarded, ignore_errors=True)
+
+    # Each output is an independent ffmpeg process, so they run side by side:
+    # a track's mux starts as soon as Demucs moves past it, and a batch's
+    # final muxes overlap with the next batch's separation.
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+        in_flight: tuple[List[_FileJob], _PendingOutputs] | None = None
+        try:
+            for batch in _plan_batches(jobs):
+                previous, in_flight = in_flight, None
+                stems = {job.file_id for job in batch}
+                if previous is not None and not stems.isdisjoint(
+                    job.file_id for job in previous[0]
+                ):
+                    # A repeated stem reuses the same WAV and Demucs paths.
+                    finish_batch(*previous, pool)
+                    previous = None
+
+                in_flight = (batch, {})
+                try:
+                    run_batch(*in_flight, pool)
+                finally:
+                    if previous is not None:
+                        finish_batch(*previous, pool)
+        finally:
+            if in_flight is not None:
+                finish_batch(*in_flight, pool)
 
-    for index, file_path in enumerate(files_iterable):
-        logger.info("Processing %s", file_path.name)
-        file_id = file_path.stem
-        has_video = file_path.suffix.lower() in {".mp4", ".mov", ".avi", ".mkv", ".webm"}
+    if progress_bar is not None:
+        progress_bar.close()
 
-        wav_path = temp_audio_dir / f"{file_id}.wav"
+    if progress_callback is not None:
+        progress_callback("complete", 1.0, "All files processed.")
 
-        per_file_start = index / len(path_inputs)
-        per_file_span = 1.0 / len(path_inputs)
+    return [result for result in results if result is not None]
 
-        def emit(stage: str, fraction: float, message: str | None = None) -> None:
-            """Emit progress update through callback if provided.
-            
-            Args:
-                stage: Processing stage identifier.
-                fraction: Progress fraction for this file (0.0 to 1.0).
-                message: Optional progress message.
-            """
-            if progress_callback is None:
-                return
-            bounded = max(0.0, min(1.0, per_file_start + per_file_span * fraction))
-            progress_callback(stage, bounded, message)
 
-        try:
-            emit("prepare", 0.02, f"Preparing {file_path.name}")
-            logger.info("Converting %s to WAV", file_path.name)
-            ffmpeg_convert_cmd = [
+def _needs_conversion(file_path: Path) -> bool:
+    """Return whether ``file_path`` differs from the WAV format ``_convert_to_wav`` writes.
+    
+    Only ``.wav`` inputs are probed; anything else always needs converting.
+    
+    Args:
+        file_path: Input media file.
+        
+    Returns:
+        False if the first audio stream is already 16-bit 44.1 kHz stereo PCM.
+    """
+    if file_path.suffix.lower() != ".wav":
+        return True
+
+    probe_cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=codec_name,sample_rate,channels",
+        "-of",
+        "csv=p=0",
+        str(file_path),
+    ]
+    try:
+        probe = subprocess.run(
+            probe_cmd,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return True
+
+    return probe.stdout.strip() != "pcm_s16le,44100,2"
+
+
+def _convert_to_wav(job: _FileJob, emit: Callable[..., None]) -> bool:
+    """Convert an input to a 44.1 kHz stereo PCM WAV Demucs can always read.
+    
+    Only used as a fallback for inputs Demucs failed to decode itself. On
+    success the job's ``source`` points at the WAV. Inputs that are already in
+    that format are left as they are.
+    
+    Args:
+        job: File to convert.
+        emit: Progress emitter from ``process_files``.
+        
+    Returns:
+        True if ``job.source`` is ready for Demucs, False if ffmpeg failed.
+    """
+    file_path = job.file_path
+    if not _needs_conversion(file_path):
+        logger.info("%s is already 16-bit 44.1 kHz stereo PCM; not converting", file_path.name)
+        emit(job, "convert", 0.18, f"{file_path.name} needs no conversion")
+        return True
+
+    os.makedirs(job.wav_path.parent, exist_ok=True)
+    logger.info("Converting %s to WAV", file_path.name)
+    ffmpeg_convert_cmd = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-nostats",
+        "-y",
+        "-i",
+        str(file_path),
+        "-threads",
+        "0",
+        "-vn",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        "44100",
+        "-ac",
+        "2",
+        str(job.wav_path),
+    ]
+    try:
+        _run_quiet(ffmpeg_convert_cmd)
+    except subprocess.CalledProcessError as exc:
+        logger.error("Processing failed for %s: %s", job.file_id, _describe_failure(exc))
+        emit(job, "error", 1.0, f"Processing failed for {file_path.name}")
+        return False
+
+    job.source = job.wav_path
+    emit(job, "convert", 0.18, f"Converted {file_path.name} to WAV")
+    return True
+
+
+def _drain_lines(handlers: Dict[IO[bytes], Callable[[bytes], None]]) -> None:
+    """Read each stream to EOF, passing every line to that stream's handler.
+    
+    Streams are multiplexed with ``selectors`` and read in large raw chunks.
+    Progress bars redraw with ``\\r``, so both it and ``\\n`` end a line; a
+    trailing partial line is delivered at EOF. Each stream is closed once
+    exhausted.
+    
+    Args:
+        handlers: Callback for the lines of each readable pipe.
+    """
+    with selectors.DefaultSelector() as selector:
+        for stream, handler in handlers.items():
+            # ``data`` carries the handler and the stream's unfinished line.
+            selector.register(stream, selectors.EVENT_READ, [handler, b""])
+
+        while selector.get_map():
+            for key, _ in selector.select():
+                handler, partial = key.data
+                chunk = os.read(key.fd, _DEMUCS_READ_SIZE)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    if partial:
+                        handler(partial)
+                    continue
+                *lines, key.data[1] = _DEMUCS_LINE_RE.split(partial + chunk)
+                for line in lines:
+                    handler(line)
+
+
+def _separate(
+    jobs: Sequence[_FileJob],
+    *,
+    model: str,
+    demucs_root: Path,
+    emit: Callable[..., None],
+    on_track_done: Callable[[_FileJob], None] | None = None,
+) -> None:
+    """Run one Demucs process over the ``source`` of every job.
+    
+    Track boundaries come from the ``Separating track <path>`` lines Demucs
+    prints on stdout. The stderr percentage only drives progress within the
+    current track: bag-of-models runs (e.g. ``htdemucs_ft``) and ``--shifts``
+    restart the bar several times per track.
+    
+    Args:
+        jobs: Files to separate, in command-line order; stems must be unique.
+        model: Demucs model name.
+        demucs_root: Output root passed to Demucs via ``-o``.
+        emit: Progress emitter from ``process_files``.
+        on_track_done: Called with each job once Demucs has started on a later
+            track, by which point its stems are saved. The last track is
+            not reported; callers handle it once this function returns.
+        
+    Raises:
+        subprocess.CalledProcessError: If Demucs exits with a non-zero status.
+    """
+    logger.info(
+        "Running Demucs (%s) on %s",
+        model,
+        ", ".join(job.file_path.name for job in jobs),
+    )
+    demucs_cmd = [
+        "demucs",
+        "--two-stems",
+        "vocals",
+        "-n",
+        model,
+        "-o",
+        str(demucs_root),
+        *(str(job.source) for job in jobs),
+    ]
+
+    # Demucs names its output folders by stem, which is unique per run.
+    positions = {job.source.stem: index for index, job in enumerate(jobs)}
+    position = 0
+    current = jobs[position]
+    furthest_percent = 0
+    emit(current, "demucs", 0.22, f"Starting Demucs for {current.file_path.name}")
+
+    def log_line(line: bytes) -> None:
+        """Log one non-empty line of Demucs output."""
+        stripped = line.strip()
+        if stripped and logger.isEnabledFor(logging.INFO):
+            logger.info("demucs: %s", stripped.decode(errors="replace"))
+
+    def handle_output(line: bytes) -> None:
+        """Log one stdout line and move on when Demucs starts a later track."""
+        nonlocal position, current, furthest_percent
+        log_line(line)
+        match = _DEMUCS_TRACK_RE.match(line.strip())
+        if not match:
+            return
+        started = positions.get(Path(os.fsdecode(match.group(1))).stem)
+        if started is None or started <= position:
+            return
+        for done in jobs[position:started]:
+            emit(done, "demucs", 0.82, f"Demucs complete for {done.file_path.name}")
+            if on_track_done is not None:
+                on_track_done(done)
+        position = started
+        current = jobs[position]
+        furthest_percent = 0
+        emit(current, "demucs", 0.22, f"Starting Demucs for {current.file_path.name}")
+
+    def handle_progress(line: bytes) -> None:
+        """Log one stderr line and report any percentage in it."""
+        nonlocal furthest_percent
+        log_line(line)
+        match = _DEMUCS_PCT_RE.search(line)
+        if not match:
+            return
+        percent = min(int(match.group(1)), 100)
+        # Restarted bars (one per sub-model or shift) never move progress back.
+        furthest_percent = max(furthest_percent, percent)
+        demucs_fraction = 0.22 + 0.6 * (furthest_percent / 100)
+        emit(
+            current,
+            "demucs",
+            demucs_fraction,
+            f"Demucs {percent}% for {current.file_path.name}",
+        )
+
+    # Demucs reports progress on stderr and track names on stdout; both pipes
+    # are drained together so neither can fill up and stall the child. Its
+    # stdout is unbuffered so each track line arrives when the track starts.
+    demucs_proc = subprocess.Popen(
+        demucs_cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+
+    handlers: Dict[IO[bytes], Callable[[bytes], None]] = {}
+    if demucs_proc.stderr is not None:
+        handlers[demucs_proc.stderr] = handle_progress
+    if demucs_proc.stdout is not None:
+        handlers[demucs_proc.stdout] = handle_output
+    _drain_lines(handlers)
+
+    return_code = demucs_proc.wait()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, demucs_cmd)
+
+    for job in jobs[position:]:
+        emit(job, "demucs", 0.82, f"Demucs complete for {job.file_path.name}")
+
+
+def _write_output(
+    job: _FileJob,
+    vocals_path: Path,
+    output_root: Path,
+    emit: Callable[..., None],
+    *,
+    fast_remux: bool = False,
+) -> ProcessingResult | None:
+    """Encode the separated vocals into the final output file.
+    
+    WAV outputs need no re-encoding and are moved into place instead.
+    
+    Args:
+        job: File the vocals belong to.
+        vocals_path: Demucs ``vocals.wav`` for the file.
+        output_root: Directory for output files.
+        emit: Progress emitter from ``process_files``.
+        fast_remux: Stream-copy the vocals into an MKV instead of encoding
+            them to AAC in an MP4 (video inputs only).
+        
+    Returns:
+        Result for the file, or None if writing the output failed.
+    """
+    file_path = job.file_path
+    file_id = job.file_id
+
+    mux_message = f"Writing output for {file_path.name}"
+    if job.has_video:
+        # MKV can carry Demucs' PCM as-is; MP4 needs the vocals in AAC.
+        if fast_remux:
+            output_path = output_root / f"{file_id}_vocals.mkv"
+            audio_codec = ["-c:a", "copy"]
+            mux_message = f"Remuxing {file_path.name} (stream copy)"
+        else:
+            output_path = output_root / f"{file_id}_vocals.mp4"
+            audio_codec = ["-c:a", "aac", "-b:a", "192k"]
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-nostats",
+            "-y",
+            "-i",
+            str(file_path),
+            "-i",
+            str(vocals_path),
+            "-threads",
+            "0",
+            "-c:v",
+            "copy",
+            *audio_codec,
+            "-map",
+            "0:v:0",
+            "-map",
+            "1:a:0",
+            "-shortest",
+            str(output_path),
+        ]
+    else:
+        original_ext = file_path.suffix.lower()
+        output_ext = original_ext if original_ext in _AUDIO_CODEC else ".wav"
+        codec = _AUDIO_CODEC[output_ext]
+        output_path = output_root / f"{file_id}_vocals{output_ext}"
+
+        # Demucs already wrote a WAV, so a stream copy is just a file move.
+        if codec == "copy":
+            ffmpeg_cmd = None
+        else:
+            ffmpeg_cmd = [
                 "ffmpeg",
+                "-loglevel",
+                "error",
+                "-nostats",
                 "-y",
                 "-i",
-                str(file_path),
-                "-vn",
-                "-acodec",
-                "pcm_s16le",
-                "-ar",
-                "44100",
-                "-ac",
-                "2",
-                str(wav_path),
-            ]
-            subprocess.run(ffmpeg_convert_cmd, check=True)
-            emit("convert", 0.18, f"Converted {file_path.name} to WAV")
-
-            logger.info("Running Demucs (%s) on %s", model, file_path.name)
-            demucs_cmd = [
-                "demucs",
-                "--two-stems",
-                "vocals",
-                "-n",
-                model,
-                "-o",
-                str(demucs_root),
-                str(wav_path),
+                str(vocals_path),
+                "-map_metadata",
+                "-1",
+                "-threads",
+                "0",
+                "-c:a",
+                codec,
+                "-b:a",
+                "192k",
+                str(output_path),
             ]
-            emit("demucs", 0.22, f"Starting Demucs for {file_path.name}")
-
-            demucs_proc = subprocess.Popen(
-                demucs_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-            )
-
-            demucs_stderr = demucs_proc.stderr
-            if demucs_stderr is not None:
-                for raw_line in iter(demucs_stderr.readline, ""):
-                    if not raw_line:
-                        break
-                    line = raw_line.strip()
-                    if line:
-                        logger.info("demucs: %s", line)
-                    match = re.search(r"(\d{1,3})%", raw_line)
-                    if match:
-                        percent = min(int(match.group(1)), 100)
-                        demucs_fraction = 0.22 + 0.6 * (percent / 100)
-                        emit(
-                            "demucs",
-                            demucs_fraction,
-                            f"Demucs {percent}% for {file_path.name}",
-                        )
-
-            if demucs_proc.stdout is not None:
-                demucs_proc.stdout.close()
-
-            return_code = demucs_proc.wait()
-            if return_code != 0:
-                raise subprocess.CalledProcessError(return_code, demucs_cmd)
-
-            emit("demucs", 0.82, f"Demucs complete for {file_path.name}")
-
-            vocals_path = demucs_root / model / file_id / "vocals.wav"
-
-            if not vocals_path.exists():
-                potential_paths = glob.glob(str(demucs_root / "*" / file_id / "vocals.wav"))
-                if potential_paths:
-                    vocals_path = Path(potential_paths[0])
-                    logger.info("Found vocals at alternate path: %s", vocals_path)
-                else:
-                    logger.warning("Could not find extracted vocals for %s", file_id)
-                    continue
 
-            if has_video:
-                output_ext = "mp4"
-                output_path = output_root / f"{file_id}_vocals.{output_ext}"
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    str(file_path),
-                    "-i",
-                    str(vocals_path),
-                    "-c:v",
-                    "copy",
-                    "-c:a",
-                    "aac",
-                    "-b:a",
-                    "192k",
-                    "-map",
-                    "0:v:0",
-                    "-map",
-                    "1:a:0",
-                    "-shortest",
-                    str(output_path),
-                ]
-            else:
-                original_ext = file_path.suffix.lower().lstrip(".")
-                allowed_exts = {"mp3", "wav", "ogg", "m4a", "aac", "opus"}
-                output_ext = original_ext if original_ext in allowed_exts else "wav"
-                output_path = output_root / f"{file_id}_vocals.{output_ext}"
-
-                codec = "copy"
-                if output_ext == "mp3":
-                    codec = "libmp3lame"
-                elif output_ext in {"aac", "m4a"}:
-                    codec = "aac"
-                elif output_ext in {"ogg", "opus"}:
-                    codec = "libopus"
-
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    str(vocals_path),
-                    "-c:a",
-                    codec,
-                    "-b:a",
-                    "192k",
-                    str(output_path),
-                ]
-
-            logger.info("Writing final output to %s", output_path)
-            subprocess.run(ffmpeg_cmd, check=True)
-            emit("mux", 0.95, f"Writing output for {file_path.name}")
-
-            results.append({
-                "input": str(file_path),
-                "output": str(output_path),
-                "id": file_id,
-            })
-            emit("file_complete", 1.0, f"Finished {file_path.name}")
-
-        except subprocess.CalledProcessError as exc:
-            logger.error("Processing failed for %s: %s", file_id, exc)
-            emit("error", per_file_span, f"Processing failed for {file_path.name}")
-        finally:
-            if wav_path.exists():
-                wav_path.unlink()
-
-            demucs_candidate = demucs_root / model / file_id
-            if demucs_candidate.exists():
-                shutil.rmtree(demucs_candidate, ignore_errors=True)
+    logger.info("Writing final output to %s", output_path)
+    try:
+        if ffmpeg_cmd is None:
+            shutil.move(vocals_path, output_path)
+        else:
+            _run_quiet(ffmpeg_cmd)
+    except subprocess.CalledProcessError as exc:
+        logger.error("Processing failed for %s: %s", file_id, _describe_failure(exc))
+        emit(job, "error", 1.0, f"Processing failed for {file_path.name}")
+        return None
+    except OSError as exc:
+        logger.error("Processing failed for %s: %s", file_id, exc)
+        emit(job, "error", 1.0, f"Processing failed for {file_path.name}")
+        return None
 
-    if progress_callback is not None:
-        progress_callback("complete", 1.0, "All files processed.")
+    emit(job, "mux", 0.95, mux_message)
+    emit(job, "file_complete", 1.0, f"Finished {file_path.name}")
 
-    return results
+    return ProcessingResult(input=str(file_path), output=str(output_path), id=file_id)
 
 
 def download_from_youtube(
@@ -282,8 +872,9 @@ def download_from_youtube(
     """Download videos from YouTube URLs and return local file paths.
     
     Uses yt-dlp to download videos in best quality format. Handles both
-    standard YouTube URLs and youtu.be short links. Falls back to timestamp-based
-    naming for unrecognized URL patterns.
+    standard YouTube URLs and youtu.be short links, which are fetched together
+    by a single yt-dlp process. Falls back to timestamp-based naming (and a
+    separate yt-dlp run) for unrecognized URL patterns.
     
     Args:
         urls: Sequence of YouTube URLs or whitespace-separated string of URLs.
@@ -308,49 +899,97 @@ def download_from_youtube(
         return []
 
     if isinstance(urls, str):
-        urls = re.split(r"\s+", urls.strip())
+        urls = _WS_RE.split(urls.strip())
 
     download_root = _ensure_path(download_dir)
-    download_root.mkdir(parents=True, exist_ok=True)
+    os.makedirs(download_root, exist_ok=True)
 
-    downloaded: List[str] = []
+    # Recognised YouTube links share one yt-dlp process (named by video id);
+    # anything else needs its own invocation with an explicit output path.
+    batch: List[tuple[str, Path]] = []
+    singles: List[tuple[str, Path]] = []
+    # Repeated links (or two links to the same video id) are fetched once.
+    seen: set[str] = set()
 
     for url in urls:
         url = url.strip()
         if not url:
             continue
 
+        match = _YT_ID_RE.search(url)
+        key = match.group(1) if match else url
+        if key in seen:
+            logger.info("Skipping duplicate URL: %s", url)
+            continue
+        seen.add(key)
+
         logger.info("Downloading from YouTube: %s", url)
 
-        if "youtube.com/watch?v=" in url:
-            video_id = url.split("youtube.com/watch?v=")[1].split("&")[0]
-        elif "youtu.be/" in url:
-            video_id = url.split("youtu.be/")[1].split("?")[0]
+        if match:
+            batch.append((url, download_root / f"{match.group(1)}.mp4"))
         else:
+            # Concurrent runs must not share an output path.
             video_id = f"yt_{int(time.time())}"
+            if singles:
+                video_id = f"{video_id}_{len(singles)}"
+            singles.append((url, download_root / f"{video_id}.mp4"))
 
-        output_path = download_root / f"{video_id}.mp4"
-        cmd = [
-            "yt-dlp",
-            "-f",
-            "b",
-            "--output",
-            str(output_path),
-            "--no-check-certificate",
-            "--geo-bypass",
-            url,
-        ]
+    runs: List[tuple[Path, List[str]]] = []
+    if batch:
+        runs.append((download_root / "%(id)s.mp4", [url for url, _ in batch]))
+    runs.extend((output_path, [url]) for url, output_path in singles)
 
-        try:
-            subprocess.run(cmd, check=True)
-        except subprocess.CalledProcessError as exc:
-            logger.error("Failed to download %s: %s", url, exc)
-            continue
+    failed: set[str] = set()
+
+    # Downloads are network-bound, so the yt-dlp processes run side by side.
+    if runs:
+        with ThreadPoolExecutor(max_workers=min(_YT_DLP_WORKERS, len(runs))) as pool:
+            outcomes = pool.map(lambda run: _run_yt_dlp(*run), runs)
+            for (_, run_urls), succeeded in zip(runs, outcomes):
+                if not succeeded:
+                    failed.update(run_urls)
 
+    downloaded: List[str] = []
+
+    for url, output_path in batch + singles:
         if output_path.exists():
             downloaded.append(str(output_path))
-            logger.info("Downloaded %s to %s", video_id, output_path)
+            logger.info("Downloaded %s to %s", url, output_path)
+        elif url in failed:
+            logger.error("Failed to download %s", url)
         else:
             logger.error("Download reported success but file missing: %s", output_path)
 
-    return downloaded
\ No newline at end of file
+    return downloaded
+
+
+def _run_yt_dlp(output: Path, urls: Sequence[str]) -> bool:
+    """Run a single yt-dlp process for ``urls`` and report whether it succeeded.
+    
+    Args:
+        output: Output path or yt-dlp output template.
+        urls: URLs to download in this invocation.
+        
+    Returns:
+        True if yt-dlp exited cleanly, False otherwise.
+    """
+    cmd = [
+        "yt-dlp",
+        "-f",
+        "b",
+        "--output",
+        str(output),
+        "--concurrent-fragments",
+        str(_YT_DLP_FRAGMENTS),
+        "--no-check-certificate",
+        "--geo-bypass",
+        *urls,
+    ]
+
+    try:
+        _run_quiet(cmd)
+    except subprocess.CalledProcessError as exc:
+        logger.error("Failed to download %s: %s", " ".join(urls), _describe_failure(exc))
+        return False
+
+    return True
@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
+import mimetypes
 import shutil
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 from string import Template
-from typing import Callable, List, Sequence
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Sequence
 
 from salsa_milk import __version__
 from salsa_milk_core import download_from_youtube, process_files
@@ -31,30 +37,84 @@ ALLOWED_EXTENSIONS = {
     "mkv",
     "webm",
 }
+# ``st.file_uploader`` types, sorted once rather than on every rerun.
+_UPLOAD_TYPES = tuple(sorted(ALLOWED_EXTENSIONS))
 AVAILABLE_MODELS = ["htdemucs"]
 
 ASSETS_DIR = Path(__file__).resolve().parent / "templates"
 
 
-@dataclass
+# Session-state key holding the previous submission's results, whose files
+# stay on disk until the next submission replaces them.
+_RESULTS_KEY = "salsa_milk_results"
+# Shared by every session for upload writes and YouTube downloads, so reruns
+# don't pay for new threads.
+_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="salsa-io")
+atexit.register(_IO_POOL.shutdown, wait=False)
+# Minimum seconds between progress-bar updates within one stage.
+_PROGRESS_INTERVAL = 0.1
+
+
+@dataclass(frozen=True, slots=True)
 class DownloadableResult:
-    """Represents an output artifact ready to be downloaded in Streamlit."""
+    """Represents an output artifact ready to be downloaded in Streamlit.
+    
+    The file stays on disk under its submission's work directory until
+    ``_discard_results`` removes it.
+    """
 
     filename: str
-    data: bytes
+    path: Path
     mime: str
 
 
-def _guess_mime(path: Path) -> str:
-    """Return a best-effort MIME type based on the file suffix.
+# Work directories whose outputs are still offered for download.
+_RETAINED_DIRS: set[Path] = set()
+
+
+def _discard_results(results: Sequence[DownloadableResult]) -> None:
+    """Delete the work directories that hold ``results``.
     
     Args:
-        path: File path to determine MIME type for.
+        results: Results returned by ``_process_submission``.
+    """
+    # Outputs live in ``<work_dir>/output``.
+    work_dirs = {result.path.parent.parent for result in results}
+    _RETAINED_DIRS.difference_update(work_dirs)
+    if work_dirs:
+        _remove_later(sorted(work_dirs))
+
+
+def _remove_later(paths: Sequence[Path]) -> threading.Thread:
+    """Delete ``paths`` on a daemon thread so large trees don't block a rerun.
+    
+    Args:
+        paths: Directories to remove.
         
     Returns:
-        MIME type string, defaults to 'application/octet-stream' if unknown.
+        The started cleanup thread.
     """
-    mapping = {
+
+    def remove() -> None:
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    thread = threading.Thread(target=remove, name="salsa-milk-cleanup", daemon=True)
+    thread.start()
+    return thread
+
+
+@atexit.register
+def _discard_retained() -> None:
+    """Delete the outputs of sessions that were never discarded."""
+
+    for work_dir in list(_RETAINED_DIRS):
+        shutil.rmtree(work_dir, ignore_errors=True)
+    _RETAINED_DIRS.clear()
+
+
+_MIME_BY_SUFFIX: Mapping[str, str] = MappingProxyType(
+    {
         ".mp3": "audio/mpeg",
         ".wav": "audio/wav",
         ".ogg": "audio/ogg",
@@ -68,10 +128,46 @@ def _guess_mime(path: Path) -> str:
         ".mkv": "video/x-matroska",
         ".webm": "video/webm",
     }
-    return mapping.get(path.suffix.lower(), "application/octet-stream")
+)
+
+
+def _guess_mime(path: Path) -> str:
+    """Return a best-effort MIME type based on the file suffix.
+    
+    Args:
+        path: File path to determine MIME type for.
+        
+    Returns:
+        MIME type string, defaults to 'application/octet-stream' if unknown.
+    """
+    # The override map covers the usual outputs; the stdlib table fills the rest.
+    return (
+        _MIME_BY_SUFFIX.get(path.suffix.lower())
+        or mimetypes.guess_type(path.name, strict=False)[0]
+        or "application/octet-stream"
+    )
+
+
+def _clamp01(fraction: float) -> float:
+    """Clamp a progress fraction to ``[0.0, 1.0]`` without builtin calls."""
+
+    return 0.0 if fraction < 0.0 else (1.0 if fraction > 1.0 else fraction)
+
+
+def _write_upload(uploaded: object, target: Path) -> None:
+    """Write one uploaded file's contents to ``target``."""
 
+    buffer = getattr(uploaded, "getbuffer", None)
+    if buffer is None:
+        raise AttributeError("Uploaded file does not provide getbuffer()")
 
-def _save_uploaded_files(uploaded_files: Sequence[object], destination: Path) -> List[str]:
+    # ``getbuffer()`` is a memoryview over the upload; writing it directly
+    # avoids copying the whole file into a new ``bytes`` first.
+    with target.open("wb") as handle:
+        handle.write(buffer())
+
+
+def _save_uploaded_files(uploaded_files: Sequence[object], destination: Path) -> List[Path]:
     """Persist uploaded files to disk and return their paths.
     
     Args:
@@ -84,22 +180,18 @@ def _save_uploaded_files(uploaded_files: Sequence[object], destination: Path) ->
     Raises:
         AttributeError: If uploaded file doesn't provide getbuffer() method.
     """
-    saved_paths: List[str] = []
     destination.mkdir(parents=True, exist_ok=True)
 
-    for uploaded in uploaded_files:
-        name = getattr(uploaded, "name", "uploaded")
-        buffer = getattr(uploaded, "getbuffer", None)
-        if buffer is None:
-            raise AttributeError("Uploaded file does not provide getbuffer()")
+    targets = [
+        destination / Path(getattr(uploaded, "name", "uploaded")).name
+        for uploaded in uploaded_files
+    ]
+    # Uploads sharing a name overwrite each other, so only the last is written.
+    latest = dict(zip(targets, uploaded_files))
 
-        safe_name = Path(name).name
-        target = destination / safe_name
-        with target.open("wb") as handle:
-            handle.write(bytes(buffer()))
-        saved_paths.append(str(target))
+    list(_IO_POOL.map(_write_upload, latest.values(), latest.keys()))
 
-    return saved_paths
+    return targets
 
 
 ProgressCallback = Callable[[str, float, str], None]
@@ -116,15 +208,30 @@ def _read_asset(filename: str) -> str:
     return asset_path.read_text(encoding="utf-8")
 
 
+@lru_cache(maxsize=None)
+def _compiled_template(filename: str) -> Template:
+    """Return the parsed ``string.Template`` for an HTML asset."""
+
+    return Template(_read_asset(filename))
+
+
+@lru_cache(maxsize=None)
+def _style_block(filename: str) -> str:
+    """Return a CSS asset wrapped in a ``<style>`` element."""
+
+    return f"<style>{_read_asset(filename)}</style>"
+
+
 def _inject_css(st_module, filename: str) -> None:
     """Add CSS styles to the Streamlit app from an external file."""
 
-    css = _read_asset(filename)
     render = getattr(st_module, "markdown", None)
     if render is not None:
-        render(f"<style>{css}</style>", unsafe_allow_html=True)
+        render(_style_block(filename), unsafe_allow_html=True)
         return
 
+    css = _read_asset(filename)
+
     fallback = getattr(st_module, "write", None)
     if fallback is not None:  # pragma: no cover - fallback for test doubles
         fallback(css)
@@ -133,8 +240,7 @@ def _inject_css(st_module, filename: str) -> None:
 def _inject_html(st_module, filename: str, **context: str) -> None:
     """Render an HTML fragment using ``string.Template`` substitution."""
 
-    template = Template(_read_asset(filename))
-    html = template.safe_substitute(**context)
+    html = _compiled_template(filename).safe_substitute(**context)
     render = getattr(st_module, "markdown", None)
     if render is not None:
         render(html, unsafe_allow_html=True)
@@ -159,7 +265,7 @@ def _process_submission(
     
     Args:
         uploaded_files: Sequence of uploaded file objects.
-        youtube_urls: Newline-separated YouTube URLs.
+        youtube_urls: Whitespace-separated YouTube URLs.
         model: Demucs model name to use.
         process_func: Function to process files (default: process_files).
         download_func: Function to download from YouTube (default: download_from_youtube).
@@ -167,13 +273,14 @@ def _process_submission(
         progress_callback: Optional callback for progress updates (stage, fraction, message).
         
     Returns:
-        List of downloadable result objects.
+        List of downloadable result objects. Their files are kept on disk;
+        pass them to ``_discard_results`` once they are no longer offered.
         
     Raises:
         ValueError: If no valid media was provided.
         RuntimeError: If processing completed but no outputs were produced.
     """
-    urls = youtube_urls.strip()
+    urls = youtube_urls.split()
     if not uploaded_files and not urls:
         raise ValueError("Provide at least one uploaded file or YouTube URL.")
 
@@ -181,8 +288,7 @@ def _process_submission(
         if progress_callback is None:
             return
 
-        bounded = min(max(fraction, 0.0), 1.0)
-        progress_callback(stage, bounded, message)
+        progress_callback(stage, _clamp01(fraction), message)
 
     work_dir = Path(workdir_factory(prefix="salsa-milk-streamlit-"))
     uploads_dir = work_dir / "uploads"
@@ -190,20 +296,29 @@ def _process_submission(
     temp_dir = work_dir / "temp"
     output_dir = work_dir / "output"
 
+    # Each directory is created by the step that fills it.
+    succeeded = False
     try:
-        uploads_dir.mkdir(parents=True, exist_ok=True)
-        downloads_dir.mkdir(parents=True, exist_ok=True)
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        output_dir.mkdir(parents=True, exist_ok=True)
-
         notify("prepare", 0.05, "Preparing workspace...")
 
-        local_paths = _save_uploaded_files(uploaded_files, uploads_dir)
+        # Downloads are network-bound, so they run while uploads are saved.
+        download = (
+            _IO_POOL.submit(download_func, urls, download_dir=downloads_dir) if urls else None
+        )
+        try:
+            local_paths = (
+                _save_uploaded_files(uploaded_files, uploads_dir) if uploaded_files else []
+            )
+        except BaseException:
+            # The download must not outlive the work directory it writes to.
+            if download is not None:
+                wait([download])
+            raise
         notify("uploads", 0.2, f"Saved {len(local_paths)} uploaded file(s)")
 
-        downloaded_paths = download_func(urls, download_dir=downloads_dir)
+        downloaded_paths = download.result() if download is not None else []
         notify("downloads", 0.35, f"Fetched {len(downloaded_paths)} YouTube item(s)")
-        all_inputs: List[str] = local_paths + downloaded_paths
+        all_inputs: List[Path | str] = [*local_paths, *downloaded_paths]
 
         if not all_inputs:
             raise ValueError("No valid media was provided for processing.")
@@ -215,7 +330,7 @@ def _process_submission(
         )
 
         def bridge(stage: str, fraction: float, message: str | None) -> None:
-            scaled = 0.35 + 0.5 * min(max(fraction, 0.0), 1.0)
+            scaled = 0.35 + 0.5 * _clamp01(fraction)
             notify(stage, scaled, message or f"Processing ({stage})...")
 
         results = process_func(
@@ -233,21 +348,25 @@ def _process_submission(
         notify("packaging", 0.92, "Packaging results for download...")
         packaged: List[DownloadableResult] = []
         for result in results:
-            output_path = Path(result["output"])
-            data = output_path.read_bytes()
+            output_path = Path(result.output)
             packaged.append(
                 DownloadableResult(
                     filename=output_path.name,
-                    data=data,
+                    path=output_path,
                     mime=_guess_mime(output_path),
                 )
             )
 
         notify("complete", 1.0, "Processing complete!")
+        _RETAINED_DIRS.add(work_dir)
+        succeeded = True
         return packaged
 
     finally:
-        shutil.rmtree(work_dir, ignore_errors=True)
+        if succeeded:
+            _remove_later([uploads_dir, downloads_dir, temp_dir])
+        else:
+            _remove_later([work_dir])
 
 
 def run(st_module=None) -> None:
@@ -276,7 +395,7 @@ def run(st_module=None) -> None:
     uploaded_files = st.file_uploader(
         "📁 Choose media files",
         accept_multiple_files=True,
-        type=sorted(ALLOWED_EXTENSIONS),
+        type=_UPLOAD_TYPES,
         help="Upload audio or video files to process"
     )
     
@@ -294,11 +413,26 @@ def run(st_module=None) -> None:
     )
 
     process_clicked = st.button("🚀 Remove Music", type="primary")
+    session_state = getattr(st, "session_state", None)
 
     if process_clicked:
+        if session_state is not None:
+            _discard_results(session_state.pop(_RESULTS_KEY, []))
+
         progress_bar = st.progress(0.0, text="Preparing to process media...")
 
-        def update_progress(_stage: str, fraction: float, message: str) -> None:
+        last_stage: str | None = None
+        last_update = 0.0
+
+        def update_progress(stage: str, fraction: float, message: str) -> None:
+            # Each update is a round-trip to the browser; coalesce bursts of
+            # Demucs ticks but never drop a new stage or the final update.
+            nonlocal last_stage, last_update
+            now = time.monotonic()
+            if stage == last_stage and fraction < 1.0 and now - last_update < _PROGRESS_INTERVAL:
+                return
+
+            last_stage, last_update = stage, now
             progress_bar.progress(fraction, text=message)
 
         with st.spinner("Processing media, this may take a few minutes..."):
@@ -319,16 +453,21 @@ def run(st_module=None) -> None:
                 progress_bar.progress(0.0, text="Processing failed. Please retry.")
                 return
 
+        if session_state is not None:
+            session_state[_RESULTS_KEY] = results
+
         progress_bar.progress(1.0, text="Processing complete!")
         st.success("✨ Processing complete!")
         
         for index, result in enumerate(results, start=1):
-            st.download_button(
-                label=f"⬇️ Download: {result.filename}",
-                data=result.data,
-                file_name=result.filename,
-                mime=result.mime,
-            )
+            # Each file is read only while its own button is built.
+            with result.path.open("rb") as handle:
+                st.download_button(
+                    label=f"⬇️ Download: {result.filename}",
+                    data=handle,
+                    file_name=result.filename,
+                    mime=result.mime,
+                )
 
     _inject_html(st, "streamlit_footer.html", version=__version__)
 
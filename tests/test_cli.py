@@ -2,18 +2,33 @@ from __future__ import annotations
 
 import importlib.util
 import sys
+import threading
 from pathlib import Path
 
 import pytest
 
+import salsa_milk_core as core
 
-CLI_SPEC = importlib.util.spec_from_file_location("salsa_milk_cli", Path("salsa-milk.py"))
-CLI_MODULE = importlib.util.module_from_spec(CLI_SPEC)
-assert CLI_SPEC.loader is not None
-CLI_SPEC.loader.exec_module(CLI_MODULE)  # type: ignore[assignment]
 
+@pytest.fixture(scope="session")
+def cli_module():
+    """Load ``salsa-milk.py`` once per session; tests patch it via ``monkeypatch``."""
 
-def test_cli_handles_missing_files(tmp_path, monkeypatch, caplog):
+    cached = sys.modules.get("salsa_milk_cli")
+    if cached is not None:
+        return cached
+
+    spec = importlib.util.spec_from_file_location(
+        "salsa_milk_cli", Path(__file__).resolve().parents[1] / "salsa-milk.py"
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["salsa_milk_cli"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_cli_handles_missing_files(cli_module, tmp_path, monkeypatch, caplog):
     missing = tmp_path / "missing.mp3"
     output_dir = tmp_path / "output"
     download_dir = tmp_path / "downloads"
@@ -33,9 +48,9 @@ def test_cli_handles_missing_files(tmp_path, monkeypatch, caplog):
         ],
     )
 
-    monkeypatch.setattr(CLI_MODULE, "download_from_youtube", lambda *args, **kwargs: [])
+    monkeypatch.setattr(core, "download_from_youtube", lambda *args, **kwargs: [])
     monkeypatch.setattr(
-        CLI_MODULE,
+        core,
         "process_files",
         lambda *_args, **_kwargs: [],
     )
@@ -43,13 +58,13 @@ def test_cli_handles_missing_files(tmp_path, monkeypatch, caplog):
     caplog.set_level("INFO")
 
     with pytest.raises(SystemExit) as exc:
-        CLI_MODULE.main()
+        cli_module.main()
 
     assert exc.value.code == 1
     assert "No valid input files" in caplog.text
 
 
-def test_cli_success_flow(tmp_path, monkeypatch, caplog):
+def test_cli_success_flow(cli_module, tmp_path, monkeypatch, caplog):
     local_file = tmp_path / "local.wav"
     local_file.write_bytes(b"data")
 
@@ -61,15 +76,15 @@ def test_cli_success_flow(tmp_path, monkeypatch, caplog):
     output_file.write_bytes(b"vocals")
 
     monkeypatch.setattr(
-        CLI_MODULE,
+        core,
         "download_from_youtube",
         lambda urls, download_dir: [str(download_dir / "yt.mp4")],
     )
 
     def fake_process(paths, **kwargs):
-        return [{"output": str(output_file)}]
+        return [core.ProcessingResult(input=str(paths[0]), output=str(output_file), id="local")]
 
-    monkeypatch.setattr(CLI_MODULE, "process_files", fake_process)
+    monkeypatch.setattr(core, "process_files", fake_process)
 
     monkeypatch.setattr(
         sys,
@@ -88,12 +103,55 @@ def test_cli_success_flow(tmp_path, monkeypatch, caplog):
     )
 
     caplog.set_level("INFO")
-    CLI_MODULE.main()
+    cli_module.main()
 
     assert "Successfully processed" in caplog.text
 
 
-def test_cli_exits_when_processing_returns_empty(tmp_path, monkeypatch, caplog):
+def test_cli_processes_local_files_while_downloading(cli_module, tmp_path, monkeypatch):
+    local_file = tmp_path / "local.wav"
+    local_file.write_bytes(b"data")
+    download_dir = tmp_path / "downloads"
+    barrier = threading.Barrier(2, timeout=5)
+    batches = []
+
+    def fake_download(urls, download_dir):
+        barrier.wait()
+        return [str(download_dir / "yt.mp4")]
+
+    def fake_process(paths, **kwargs):
+        if not batches:
+            barrier.wait()
+        batches.append([Path(path).name for path in paths])
+        return [
+            core.ProcessingResult(input=str(path), output=str(path), id=Path(path).stem)
+            for path in paths
+        ]
+
+    monkeypatch.setattr(core, "download_from_youtube", fake_download)
+    monkeypatch.setattr(core, "process_files", fake_process)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "salsa-milk.py",
+            str(local_file),
+            "https://youtu.be/demo",
+            "--output-dir",
+            str(tmp_path / "output"),
+            "--download-dir",
+            str(download_dir),
+            "--temp-dir",
+            str(tmp_path / "temp"),
+        ],
+    )
+
+    cli_module.main()
+
+    assert batches == [["local.wav"], ["yt.mp4"]]
+
+
+def test_cli_exits_when_processing_returns_empty(cli_module, tmp_path, monkeypatch, caplog):
     local_file = tmp_path / "local.wav"
     local_file.write_bytes(b"data")
 
@@ -102,12 +160,12 @@ def test_cli_exits_when_processing_returns_empty(tmp_path, monkeypatch, caplog):
     temp_dir = tmp_path / "temp"
 
     monkeypatch.setattr(
-        CLI_MODULE,
+        core,
         "download_from_youtube",
         lambda urls, download_dir: [],
     )
 
-    monkeypatch.setattr(CLI_MODULE, "process_files", lambda *_args, **_kwargs: [])
+    monkeypatch.setattr(core, "process_files", lambda *_args, **_kwargs: [])
 
     monkeypatch.setattr(
         sys,
@@ -127,14 +185,61 @@ def test_cli_exits_when_processing_returns_empty(tmp_path, monkeypatch, caplog):
     caplog.set_level("INFO")
 
     with pytest.raises(SystemExit) as exc:
-        CLI_MODULE.main()
+        cli_module.main()
 
     assert exc.value.code == 1
     assert "No files were successfully processed" in caplog.text
 
 
-def test_cli_version_flag(monkeypatch):
+def test_cli_version_flag(cli_module, monkeypatch, capsys):
     monkeypatch.setattr(sys, "argv", ["salsa-milk.py", "--version"])
+    monkeypatch.setattr(cli_module, "get_version", lambda: "9.9.9")
+    monkeypatch.setattr(
+        cli_module, "parse_args", lambda: pytest.fail("--version should not build the parser")
+    )
     with pytest.raises(SystemExit) as exc:
-        CLI_MODULE.main()
+        cli_module.main()
     assert exc.value.code == 0
+    assert capsys.readouterr().out == "salsa-milk.py 9.9.9\n"
+
+
+def test_configure_logging_buffers_stdout(cli_module, monkeypatch):
+    import logging
+    import logging.handlers
+
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(cli_module.atexit, "register", lambda func: func)
+    monkeypatch.setattr(cli_module.threading.Thread, "start", lambda self: None)
+
+    cli_module.configure_logging()
+
+    (handler,) = root.handlers
+    assert isinstance(handler, logging.handlers.MemoryHandler)
+    assert handler.flushLevel == logging.WARNING
+    assert handler.target.stream is sys.stdout
+
+
+def test_cli_version_is_resolved_only_on_request(cli_module, monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr(cli_module, "get_version", lambda: calls.append(1) or "9.9.9")
+
+    monkeypatch.setattr(sys, "argv", ["salsa-milk.py", "song.mp3"])
+    cli_module.parse_args()
+    assert calls == []
+
+    monkeypatch.setattr(sys, "argv", ["salsa-milk.py", "--version"])
+    with pytest.raises(SystemExit):
+        cli_module.parse_args()
+    assert calls == [1]
+    assert capsys.readouterr().out == "salsa-milk.py 9.9.9\n"
+
+
+def test_cli_max_workers_must_be_positive(cli_module, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["salsa-milk.py", "song.mp3", "--max-workers", "3"])
+    assert cli_module.parse_args().max_workers == 3
+
+    monkeypatch.setattr(sys, "argv", ["salsa-milk.py", "song.mp3", "--max-workers", "0"])
+    with pytest.raises(SystemExit):
+        cli_module.parse_args()
+    assert "expected a positive integer" in capsys.readouterr().err
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import io
+import os
+import shutil
 import subprocess
+import threading
 import time
 from pathlib import Path
 
@@ -10,6 +13,82 @@ import pytest
 import salsa_milk_core as core
 
 
+def pipe_stream(data: bytes = b""):
+    """Return a real pipe reader holding ``data``, like a finished child's output."""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, data)
+    os.close(write_fd)
+    return os.fdopen(read_fd, "rb")
+
+
+def test_ensure_directory_only_creates_once(tmp_path, monkeypatch):
+    target = tmp_path / "nested" / "dir"
+    calls = []
+    original = core.os.makedirs
+
+    def recording_makedirs(path, exist_ok=False):
+        calls.append(path)
+        original(path, exist_ok=exist_ok)
+
+    monkeypatch.setattr(core.os, "makedirs", recording_makedirs)
+
+    assert core.ensure_directory(target) == target
+    first_calls = len(calls)
+    assert core.ensure_directory(str(target)) == target
+    assert target.is_dir()
+    assert calls[0] == str(target)
+    assert len(calls) == first_calls
+
+
+def test_process_files_reruns_after_temp_dir_is_wiped(tmp_path, monkeypatch):
+    audio_path = tmp_path / "song.mp3"
+    audio_path.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    output_dir = tmp_path / "output"
+
+    def fake_run(cmd, check, **_kwargs):
+        # Like ffmpeg, fail rather than create a missing output directory.
+        Path(cmd[-1]).write_bytes(b"wav" if cmd[-1].endswith(".wav") else b"final")
+
+    class FakeProc:
+        def __init__(self, *_args, **_kwargs):
+            vocals_path = temp_dir / "demucs" / "htdemucs" / audio_path.stem / "vocals.wav"
+            vocals_path.parent.mkdir(parents=True, exist_ok=True)
+            vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream()
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc())
+
+    for _ in range(2):
+        results = core.process_files(
+            [audio_path],
+            temp_dir=temp_dir,
+            output_dir=output_dir,
+            enable_progress=False,
+        )
+        assert len(results) == 1
+        shutil.rmtree(temp_dir)
+
+
+def test_scan_vocals_prefers_requested_model(tmp_path):
+    for model, track in (("alt", "song"), ("alt", "other"), ("htdemucs", "song")):
+        (tmp_path / model / track).mkdir(parents=True)
+    (tmp_path / "stray.txt").write_text("x")
+
+    vocals = core._scan_vocals(tmp_path, "htdemucs")
+
+    assert vocals == {
+        "song": tmp_path / "htdemucs" / "song" / "vocals.wav",
+        "other": tmp_path / "alt" / "other" / "vocals.wav",
+    }
+    assert core._scan_vocals(tmp_path / "missing", "htdemucs") == {}
+
+
 def test_process_files_empty_returns_list():
     assert core.process_files([]) == []
 
@@ -20,7 +99,7 @@ def test_process_files_audio_success(tmp_path, monkeypatch):
     temp_dir = tmp_path / "temp"
     output_dir = tmp_path / "output"
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         if cmd[0] == "ffmpeg" and cmd[-1].endswith(".wav"):
             Path(cmd[-1]).parent.mkdir(parents=True, exist_ok=True)
             Path(cmd[-1]).write_bytes(b"wav")
@@ -37,8 +116,8 @@ def test_process_files_audio_success(tmp_path, monkeypatch):
             vocals_path = temp_dir / "demucs" / "htdemucs" / audio_path.stem / "vocals.wav"
             vocals_path.parent.mkdir(parents=True, exist_ok=True)
             vocals_path.write_bytes(b"vocals")
-            self.stderr = io.StringIO("10%\n100%\n")
-            self.stdout = io.StringIO("")
+            self.stderr = pipe_stream(b"10%\n100%\n")
+            self.stdout = pipe_stream()
 
         def wait(self):
             return 0
@@ -54,10 +133,73 @@ def test_process_files_audio_success(tmp_path, monkeypatch):
 
     assert len(results) == 1
     expected_output = output_dir / f"{audio_path.stem}_vocals.mp3"
-    assert Path(results[0]["output"]) == expected_output
+    assert Path(results[0].output) == expected_output
     assert expected_output.exists()
 
 
+def test_process_files_moves_wav_output_without_ffmpeg(tmp_path, monkeypatch):
+    audio_path = tmp_path / "take.flac"
+    audio_path.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    output_dir = tmp_path / "output"
+
+    def fake_run(cmd, check, **_kwargs):  # pragma: no cover - must not be called
+        raise AssertionError(f"Unexpected command: {cmd}")
+
+    class FakeProc:
+        def __init__(self, *_args, **_kwargs):
+            vocals_path = temp_dir / "demucs" / "htdemucs" / audio_path.stem / "vocals.wav"
+            vocals_path.parent.mkdir(parents=True, exist_ok=True)
+            vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"100%\n")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc())
+
+    results = core.process_files([audio_path], temp_dir=temp_dir, output_dir=output_dir)
+
+    expected_output = output_dir / "take_vocals.wav"
+    assert [Path(result.output) for result in results] == [expected_output]
+    assert expected_output.read_bytes() == b"vocals"
+
+
+def test_process_files_caps_worker_pool(tmp_path, monkeypatch):
+    audio_path = tmp_path / "take.flac"
+    audio_path.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    pool_sizes = []
+
+    class RecordingPool(core.ThreadPoolExecutor):
+        def __init__(self, max_workers=None, **kwargs):
+            pool_sizes.append(max_workers)
+            super().__init__(max_workers=max_workers, **kwargs)
+
+    class FakeProc:
+        def __init__(self, *_args, **_kwargs):
+            vocals_path = temp_dir / "demucs" / "htdemucs" / audio_path.stem / "vocals.wav"
+            vocals_path.parent.mkdir(parents=True, exist_ok=True)
+            vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"100%\n")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core, "ThreadPoolExecutor", RecordingPool)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc())
+
+    results = core.process_files(
+        [audio_path], temp_dir=temp_dir, output_dir=tmp_path / "output", max_workers=2
+    )
+
+    assert len(results) == 1
+    assert pool_sizes == [2]
+
+
 def test_process_files_video_with_alternate_vocals(tmp_path, monkeypatch):
     video_path = tmp_path / "clip.mp4"
     video_path.write_bytes(b"video")
@@ -65,7 +207,7 @@ def test_process_files_video_with_alternate_vocals(tmp_path, monkeypatch):
     output_dir = tmp_path / "output"
     alt_vocals = temp_dir / "demucs" / "alt" / video_path.stem / "vocals.wav"
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         if cmd[0] == "ffmpeg" and cmd[-1].endswith(".wav"):
             Path(cmd[-1]).parent.mkdir(parents=True, exist_ok=True)
             Path(cmd[-1]).write_bytes(b"wav")
@@ -76,14 +218,13 @@ def test_process_files_video_with_alternate_vocals(tmp_path, monkeypatch):
             raise AssertionError(f"Unexpected command: {cmd}")
 
     monkeypatch.setattr(core.subprocess, "run", fake_run)
-    monkeypatch.setattr(core.glob, "glob", lambda pattern: [str(alt_vocals)])
 
     class FakeProc:
         def __init__(self, *_args, **_kwargs):
             alt_vocals.parent.mkdir(parents=True, exist_ok=True)
             alt_vocals.write_bytes(b"vocals")
-            self.stderr = io.StringIO("25%\n75%\n100%\n")
-            self.stdout = io.StringIO("")
+            self.stderr = pipe_stream(b"25%\n75%\n100%\n")
+            self.stdout = pipe_stream()
 
         def wait(self):
             return 0
@@ -93,17 +234,66 @@ def test_process_files_video_with_alternate_vocals(tmp_path, monkeypatch):
     results = core.process_files([video_path], temp_dir=temp_dir, output_dir=output_dir)
 
     assert len(results) == 1
-    assert results[0]["output"].endswith(".mp4")
+    assert results[0].output.endswith(".mp4")
+
+
+def test_process_files_fast_remux_copies_streams_into_mkv(tmp_path, monkeypatch):
+    video_path = tmp_path / "clip.mp4"
+    video_path.write_bytes(b"video")
+    temp_dir = tmp_path / "temp"
+    commands = []
+
+    def fake_run(cmd, check, **_kwargs):
+        commands.append(cmd)
+        Path(cmd[-1]).parent.mkdir(parents=True, exist_ok=True)
+        Path(cmd[-1]).write_bytes(b"video")
+
+    class FakeProc:
+        def __init__(self, *_args, **_kwargs):
+            vocals_path = temp_dir / "demucs" / "htdemucs" / "clip" / "vocals.wav"
+            vocals_path.parent.mkdir(parents=True, exist_ok=True)
+            vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"100%\n")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc())
+
+    results = core.process_files(
+        [video_path],
+        temp_dir=temp_dir,
+        output_dir=tmp_path / "output",
+        fast_remux=True,
+    )
+
+    assert results[0].output.endswith("clip_vocals.mkv")
+    (cmd,) = commands
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+    assert "-b:a" not in cmd
+    assert cmd[cmd.index("-threads") + 1] == "0"
 
 
 def test_process_files_handles_subprocess_errors(tmp_path, monkeypatch, caplog):
     media_path = tmp_path / "broken.wav"
     media_path.write_bytes(b"broken")
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         raise subprocess.CalledProcessError(returncode=1, cmd=cmd)
 
+    class FailingProc:
+        def __init__(self, *_args, **_kwargs):
+            self.stderr = pipe_stream(b"")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 1
+
     monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FailingProc())
     caplog.set_level("ERROR")
 
     results = core.process_files([media_path], temp_dir=tmp_path / "temp", output_dir=tmp_path / "out")
@@ -112,13 +302,164 @@ def test_process_files_handles_subprocess_errors(tmp_path, monkeypatch, caplog):
     assert "Processing failed" in caplog.text
 
 
+def test_process_files_passes_inputs_to_demucs_and_falls_back_to_wav(tmp_path, monkeypatch):
+    audio_path = tmp_path / "song.mp3"
+    audio_path.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    output_dir = tmp_path / "output"
+
+    ffmpeg_targets = []
+
+    def fake_run(cmd, check, **_kwargs):
+        target = Path(cmd[-1])
+        ffmpeg_targets.append(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(b"data")
+
+    demucs_inputs = []
+
+    class FakeProc:
+        def __init__(self, args, **_kwargs):
+            track = Path(args[-1])
+            demucs_inputs.append(track)
+            self.returncode = 1 if track.suffix == ".mp3" else 0
+            if not self.returncode:
+                vocals_path = temp_dir / "demucs" / "htdemucs" / track.stem / "vocals.wav"
+                vocals_path.parent.mkdir(parents=True, exist_ok=True)
+                vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"100%\n")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return self.returncode
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc(args[0]))
+
+    results = core.process_files([audio_path], temp_dir=temp_dir, output_dir=output_dir)
+
+    assert demucs_inputs == [audio_path, temp_dir / "audio" / "song.wav"]
+    assert ffmpeg_targets[0] == temp_dir / "audio" / "song.wav"
+    assert len(results) == 1
+
+
+def test_process_files_retries_pcm_wav_without_converting(tmp_path, monkeypatch):
+    broken = tmp_path / "broken.mp3"
+    ready = tmp_path / "ready.wav"
+    for media in (broken, ready):
+        media.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    commands = []
+
+    def fake_run(cmd, check, **_kwargs):
+        commands.append(cmd[0])
+        if cmd[0] == "ffprobe":
+            return subprocess.CompletedProcess(cmd, 0, stdout="pcm_s16le,44100,2\n")
+        raise subprocess.CalledProcessError(returncode=1, cmd=cmd)
+
+    demucs_inputs = []
+
+    class FakeProc:
+        def __init__(self, args, **_kwargs):
+            tracks = args[args.index("-o") + 2 :]
+            demucs_inputs.append(tracks)
+            self.returncode = 1 if str(broken) in tracks else 0
+            self.stderr = pipe_stream(b"")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return self.returncode
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc(args[0]))
+
+    core.process_files([broken, ready], temp_dir=temp_dir, output_dir=tmp_path / "output")
+
+    assert demucs_inputs == [[str(broken), str(ready)], [str(ready)]]
+    assert commands.count("ffprobe") == 1
+    assert commands.count("ffmpeg") == 1
+
+
+def test_process_files_converts_fallback_wavs_concurrently(tmp_path, monkeypatch):
+    inputs = [tmp_path / "one.mp3", tmp_path / "two.mp3"]
+    for media in inputs:
+        media.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    both_converting = threading.Barrier(2, timeout=5)
+
+    def fake_run(cmd, check, **_kwargs):
+        target = Path(cmd[-1])
+        if target.suffix == ".wav":
+            both_converting.wait()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(b"data")
+
+    class FakeProc:
+        def __init__(self, args, **_kwargs):
+            tracks = [Path(track) for track in args[args.index("-o") + 2 :]]
+            self.returncode = 1 if tracks[0].suffix == ".mp3" else 0
+            if not self.returncode:
+                for track in tracks:
+                    vocals_path = temp_dir / "demucs" / "htdemucs" / track.stem / "vocals.wav"
+                    vocals_path.parent.mkdir(parents=True, exist_ok=True)
+                    vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return self.returncode
+
+    monkeypatch.setattr(core.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc(args[0]))
+
+    results = core.process_files(inputs, temp_dir=temp_dir, output_dir=tmp_path / "output")
+
+    assert [Path(result.output).name for result in results] == ["one_vocals.mp3", "two_vocals.mp3"]
+
+
+def test_process_files_splits_batches_on_duplicate_stems(tmp_path, monkeypatch):
+    first = tmp_path / "clip.mp3"
+    second = tmp_path / "clip.ogg"
+    for media in (first, second):
+        media.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    output_dir = tmp_path / "output"
+
+    def fake_run(cmd, check, **_kwargs):
+        Path(cmd[-1]).parent.mkdir(parents=True, exist_ok=True)
+        Path(cmd[-1]).write_bytes(b"output")
+
+    demucs_calls = []
+
+    class FakeProc:
+        def __init__(self, args, **_kwargs):
+            demucs_calls.append(args[args.index("-o") + 2 :])
+            vocals_path = temp_dir / "demucs" / "htdemucs" / "clip" / "vocals.wav"
+            vocals_path.parent.mkdir(parents=True, exist_ok=True)
+            vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"100%\n")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc(args[0]))
+
+    results = core.process_files([first, second], temp_dir=temp_dir, output_dir=output_dir)
+
+    assert demucs_calls == [[str(first)], [str(second)]]
+    assert [Path(result.output).name for result in results] == ["clip_vocals.mp3", "clip_vocals.ogg"]
+
+
 def test_process_files_missing_vocals_skips_entry(tmp_path, monkeypatch, caplog):
     audio_path = tmp_path / "song.mp3"
     audio_path.write_bytes(b"data")
     temp_dir = tmp_path / "temp"
     output_dir = tmp_path / "output"
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         if cmd[0] == "ffmpeg" and cmd[-1].endswith(".wav"):
             Path(cmd[-1]).parent.mkdir(parents=True, exist_ok=True)
             Path(cmd[-1]).write_bytes(b"wav")
@@ -126,12 +467,11 @@ def test_process_files_missing_vocals_skips_entry(tmp_path, monkeypatch, caplog)
             raise AssertionError
 
     monkeypatch.setattr(core.subprocess, "run", fake_run)
-    monkeypatch.setattr(core.glob, "glob", lambda pattern: [])
 
     class FakeProc:
         def __init__(self, *_args, **_kwargs):
-            self.stderr = io.StringIO("")
-            self.stdout = io.StringIO("")
+            self.stderr = pipe_stream(b"")
+            self.stdout = pipe_stream()
 
         def wait(self):
             return 0
@@ -147,7 +487,7 @@ def test_process_files_missing_vocals_skips_entry(tmp_path, monkeypatch, caplog)
 
 def test_process_files_uses_progress_bar_and_codecs(tmp_path, monkeypatch):
     aac_path = tmp_path / "clip.aac"
-    ogg_path = tmp_path / "clip.ogg"
+    ogg_path = tmp_path / "song.ogg"
     for media in (aac_path, ogg_path):
         media.write_bytes(b"data")
 
@@ -156,7 +496,7 @@ def test_process_files_uses_progress_bar_and_codecs(tmp_path, monkeypatch):
 
     codecs_seen = []
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         target = Path(cmd[-1])
         if cmd[0] == "ffmpeg" and target.suffix == ".wav":
             target.parent.mkdir(parents=True, exist_ok=True)
@@ -164,29 +504,31 @@ def test_process_files_uses_progress_bar_and_codecs(tmp_path, monkeypatch):
         elif cmd[0] == "ffmpeg":
             codec_index = cmd.index("-c:a") + 1
             codecs_seen.append(cmd[codec_index])
+            assert cmd[cmd.index("-threads") + 1] == "0"
             target.parent.mkdir(parents=True, exist_ok=True)
             target.write_bytes(b"output")
         else:  # pragma: no cover - guard for unexpected commands during tests
             raise AssertionError
 
-    def fake_tqdm(iterable, desc):
-        assert desc == "Processing files"
-        fake_tqdm.called = True
-        return list(iterable)
-
-    fake_tqdm.called = False
+    class FakeTTY(io.StringIO):
+        def isatty(self):
+            return True
 
+    stderr = FakeTTY()
     monkeypatch.setattr(core.subprocess, "run", fake_run)
-    monkeypatch.setattr(core, "tqdm", fake_tqdm)
+    monkeypatch.setattr(core.sys, "stderr", stderr)
+
+    demucs_calls = []
 
     class FakeProc:
         def __init__(self, args, **_kwargs):
-            track_name = Path(args[-1]).stem
-            vocals_path = temp_dir / "demucs" / "htdemucs" / track_name / "vocals.wav"
-            vocals_path.parent.mkdir(parents=True, exist_ok=True)
-            vocals_path.write_bytes(b"vocals")
-            self.stderr = io.StringIO("50%\n100%\n")
-            self.stdout = io.StringIO("")
+            demucs_calls.append(args)
+            for track in args[args.index("-o") + 2 :]:
+                vocals_path = temp_dir / "demucs" / "htdemucs" / Path(track).stem / "vocals.wav"
+                vocals_path.parent.mkdir(parents=True, exist_ok=True)
+                vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"50%\n100%\n0%\n100%\n")
+            self.stdout = pipe_stream()
 
         def wait(self):
             return 0
@@ -200,18 +542,109 @@ def test_process_files_uses_progress_bar_and_codecs(tmp_path, monkeypatch):
         enable_progress=True,
     )
 
-    assert fake_tqdm.called
+    assert stderr.getvalue().endswith("\rProcessing files: 2/2\n")
+    assert len(demucs_calls) == 1
     assert len(results) == 2
     assert set(codecs_seen) == {"aac", "libopus"}
 
 
+def test_process_files_muxes_finished_tracks_while_demucs_runs(tmp_path, monkeypatch):
+    first = tmp_path / "first.mp3"
+    second = tmp_path / "second.mp3"
+    for media in (first, second):
+        media.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    output_dir = tmp_path / "output"
+    first_written = threading.Event()
+
+    def fake_run(cmd, check, **_kwargs):
+        target = Path(cmd[-1])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(b"output")
+        if target.name == "first_vocals.mp3":
+            first_written.set()
+
+    class FakeProc:
+        def __init__(self, args, **_kwargs):
+            for track in args[args.index("-o") + 2 :]:
+                vocals_path = temp_dir / "demucs" / "htdemucs" / Path(track).stem / "vocals.wav"
+                vocals_path.parent.mkdir(parents=True, exist_ok=True)
+                vocals_path.write_bytes(b"vocals")
+            tracks = args[args.index("-o") + 2 :]
+            self.stderr = pipe_stream(b"100%\n0%\n100%\n")
+            self.stdout = pipe_stream(
+                b"".join(f"Separating track {track}\n".encode() for track in tracks)
+            )
+
+        def wait(self):
+            # Demucs is still "running" here, after reporting the second track.
+            assert first_written.wait(timeout=5)
+            return 0
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc(args[0]))
+
+    results = core.process_files([first, second], temp_dir=temp_dir, output_dir=output_dir)
+
+    assert [Path(result.output).name for result in results] == [
+        "first_vocals.mp3",
+        "second_vocals.mp3",
+    ]
+
+
+def test_process_files_overlaps_batch_muxes_with_next_separation(tmp_path, monkeypatch):
+    first = tmp_path / "first.mp3"
+    second = tmp_path / "second.mp3"
+    for media in (first, second):
+        media.write_bytes(b"data")
+    temp_dir = tmp_path / "temp"
+    second_started = threading.Event()
+
+    def fake_run(cmd, check, **_kwargs):
+        target = Path(cmd[-1])
+        if target.name == "first_vocals.mp3":
+            # The first batch's output is still being written when Demucs
+            # starts on the second batch.
+            assert second_started.wait(timeout=5)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(b"output")
+
+    class FakeProc:
+        def __init__(self, args, **_kwargs):
+            track = Path(args[-1])
+            if track.stem == "second":
+                second_started.set()
+            vocals_path = temp_dir / "demucs" / "htdemucs" / track.stem / "vocals.wav"
+            vocals_path.parent.mkdir(parents=True, exist_ok=True)
+            vocals_path.write_bytes(b"vocals")
+            self.stderr = pipe_stream(b"100%\n")
+            self.stdout = pipe_stream()
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core, "_DEMUCS_BATCH_SIZE", 1)
+    monkeypatch.setattr(core.os, "cpu_count", lambda: 2)
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc(args[0]))
+
+    results = core.process_files([first, second], temp_dir=temp_dir, output_dir=tmp_path / "output")
+
+    assert [Path(result.output).name for result in results] == [
+        "first_vocals.mp3",
+        "second_vocals.mp3",
+    ]
+    assert not (temp_dir / "demucs" / "htdemucs" / "first").exists()
+    assert list((temp_dir / "discard").iterdir()) == []
+
+
 def test_process_files_emits_progress_updates(tmp_path, monkeypatch):
     audio_path = tmp_path / "song.mp3"
     audio_path.write_bytes(b"data")
     temp_dir = tmp_path / "temp"
     output_dir = tmp_path / "output"
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         if cmd[0] == "ffmpeg" and cmd[-1].endswith(".wav"):
             Path(cmd[-1]).parent.mkdir(parents=True, exist_ok=True)
             Path(cmd[-1]).write_bytes(b"wav")
@@ -224,8 +657,8 @@ def test_process_files_emits_progress_updates(tmp_path, monkeypatch):
             vocals_path = temp_dir / "demucs" / "htdemucs" / audio_path.stem / "vocals.wav"
             vocals_path.parent.mkdir(parents=True, exist_ok=True)
             vocals_path.write_bytes(b"vocals")
-            self.stderr = io.StringIO("20%\n60%\n100%\n")
-            self.stdout = io.StringIO("")
+            self.stderr = pipe_stream(b"20%\n60%\n100%\n")
+            self.stdout = pipe_stream()
 
         def wait(self):
             return 0
@@ -247,14 +680,116 @@ def test_process_files_emits_progress_updates(tmp_path, monkeypatch):
     assert events[-1][1] == pytest.approx(1.0)
 
 
+def test_separate_parses_carriage_returns_split_across_reads(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(core, "_DEMUCS_READ_SIZE", 3)
+    caplog.set_level("INFO")
+    class FakeProc:
+        def __init__(self, *_args, **_kwargs):
+            self.stderr = pipe_stream(b" 25%|##  |\r 75%|######|\r100%|########|\n")
+            self.stdout = pipe_stream(b"Separating track song.mp3\n")
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc())
+    job = core._FileJob(
+        index=0,
+        file_path=tmp_path / "song.mp3",
+        file_id="song",
+        has_video=False,
+        wav_path=tmp_path / "song.wav",
+    )
+    events = []
+
+    core._separate(
+        [job],
+        model="htdemucs",
+        demucs_root=tmp_path,
+        emit=lambda _job, stage, fraction, message=None: events.append(message),
+    )
+
+    assert [message for message in events if "%" in message] == [
+        "Demucs 25% for song.mp3",
+        "Demucs 75% for song.mp3",
+        "Demucs 100% for song.mp3",
+    ]
+    assert "demucs: Separating track song.mp3" in caplog.text
+
+
+def test_separate_takes_track_boundaries_from_stdout(tmp_path, monkeypatch):
+    jobs = []
+    for index, name in enumerate(("first.mp3", "second.mp3")):
+        job = core._FileJob(
+            index=index,
+            file_path=tmp_path / name,
+            file_id=Path(name).stem,
+            has_video=False,
+            wav_path=tmp_path / f"{Path(name).stem}.wav",
+        )
+        jobs.append(job)
+    # htdemucs_ft runs four sub-models, each restarting the bar for a track.
+    first_track = b"".join(b"0%\n50%\n100%\n" for _ in range(4))
+    stderr_read, stderr_write = os.pipe()
+    stdout_read, stdout_write = os.pipe()
+    done = []
+    events = []
+
+    class FakeProc:
+        def __init__(self, *_args, **_kwargs):
+            self.stderr = os.fdopen(stderr_read, "rb")
+            self.stdout = os.fdopen(stdout_read, "rb")
+
+        def wait(self):
+            return 0
+
+    def feed():
+        os.write(stdout_write, f"Separating track {jobs[0].source}\n".encode())
+        os.write(stderr_write, first_track)
+        # Wait until every bar restart has been read before the next track.
+        deadline = time.monotonic() + 5
+        while len(events) < 13 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        os.write(stdout_write, f"Separating track {jobs[1].source}\n".encode())
+        deadline = time.monotonic() + 5
+        while not done and time.monotonic() < deadline:
+            time.sleep(0.01)
+        os.write(stderr_write, b"40%\n")
+        os.close(stderr_write)
+        os.close(stdout_write)
+
+    monkeypatch.setattr(core.subprocess, "Popen", lambda *args, **kwargs: FakeProc())
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+
+    core._separate(
+        jobs,
+        model="htdemucs_ft",
+        demucs_root=tmp_path,
+        emit=lambda job, stage, fraction, message=None: events.append((job.index, fraction)),
+        on_track_done=lambda job: done.append((job.index, len(events))),
+    )
+    feeder.join()
+
+    # The first track is only handed over once Demucs announces the second.
+    assert done == [(0, 14)]
+    first_fractions = [fraction for index, fraction in events if index == 0]
+    assert first_fractions == sorted(first_fractions)
+    assert events[-2] == (1, pytest.approx(0.22 + 0.6 * 0.4))
+
+
 def test_download_from_youtube_handles_various_urls(tmp_path, monkeypatch):
     urls = " https://www.youtube.com/watch?v=abc123  https://youtu.be/xyz789 \nhttps://example.com/video "
     monkeypatch.setattr(time, "time", lambda: 42)
-
-    def fake_run(cmd, check):
-        output_index = cmd.index("--output") + 1
-        Path(cmd[output_index]).parent.mkdir(parents=True, exist_ok=True)
-        Path(cmd[output_index]).write_bytes(b"video")
+    commands = []
+
+    def fake_run(cmd, check, **_kwargs):
+        commands.append(cmd)
+        output = cmd[cmd.index("--output") + 1]
+        for url in cmd[cmd.index("--geo-bypass") + 1 :]:
+            video_id = url.rsplit("/", 1)[-1].split("=")[-1]
+            target = Path(output.replace("%(id)s", video_id))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(b"video")
 
     monkeypatch.setattr(core.subprocess, "run", fake_run)
 
@@ -266,13 +801,76 @@ def test_download_from_youtube_handles_various_urls(tmp_path, monkeypatch):
         tmp_path / "yt_42.mp4",
     }
     assert set(map(Path, results)) == expected_files
+    assert len(commands) == 2
+    assert ["https://www.youtube.com/watch?v=abc123", "https://youtu.be/xyz789"] in [
+        cmd[cmd.index("--geo-bypass") + 1 :] for cmd in commands
+    ]
+
+
+def test_download_from_youtube_runs_downloads_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 42)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_run(cmd, check, **_kwargs):
+        barrier.wait()
+        Path(cmd[cmd.index("--output") + 1].replace("%(id)s", "abc123")).write_bytes(b"video")
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+
+    results = core.download_from_youtube(
+        ["https://youtu.be/abc123", "https://example.com/a", "https://example.com/b"],
+        download_dir=tmp_path,
+    )
+
+    assert [Path(path).name for path in results] == ["abc123.mp4", "yt_42.mp4", "yt_42_1.mp4"]
+
+
+def test_download_from_youtube_strips_query_parameters(tmp_path, monkeypatch):
+    commands = []
+
+    def fake_run(cmd, check, **_kwargs):
+        commands.append(cmd)
+        for video_id in ("abc123", "x-y_z"):
+            (tmp_path / f"{video_id}.mp4").write_bytes(b"video")
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+
+    results = core.download_from_youtube(
+        ["https://www.youtube.com/watch?v=abc123&list=PL1", "https://youtu.be/x-y_z?t=30"],
+        download_dir=tmp_path,
+    )
+
+    assert [Path(path).name for path in results] == ["abc123.mp4", "x-y_z.mp4"]
+    assert len(commands) == 1
+
+
+def test_download_from_youtube_skips_duplicate_urls(tmp_path, monkeypatch):
+    commands = []
+
+    def fake_run(cmd, check, **_kwargs):
+        commands.append(cmd[cmd.index("--geo-bypass") + 1 :])
+        (tmp_path / "abc123.mp4").write_bytes(b"video")
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+
+    results = core.download_from_youtube(
+        [
+            "https://youtu.be/abc123",
+            "https://youtu.be/abc123",
+            "https://www.youtube.com/watch?v=abc123",
+        ],
+        download_dir=tmp_path,
+    )
+
+    assert results == [str(tmp_path / "abc123.mp4")]
+    assert commands == [["https://youtu.be/abc123"]]
 
 
 def test_download_from_youtube_handles_failures(tmp_path, monkeypatch, caplog):
     caplog.set_level("ERROR")
     calls = 0
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         nonlocal calls
         calls += 1
         raise subprocess.CalledProcessError(returncode=1, cmd=cmd)
@@ -286,6 +884,26 @@ def test_download_from_youtube_handles_failures(tmp_path, monkeypatch, caplog):
     assert calls == 1
 
 
+def test_download_from_youtube_logs_captured_stderr(tmp_path, monkeypatch, caplog):
+    caplog.set_level("ERROR")
+    seen_kwargs = {}
+
+    def fake_run(cmd, check, **kwargs):
+        seen_kwargs.update(kwargs)
+        raise subprocess.CalledProcessError(
+            returncode=1,
+            cmd=cmd,
+            stderr="[youtube] fail: Downloading\nERROR: Video unavailable\n",
+        )
+
+    monkeypatch.setattr(core.subprocess, "run", fake_run)
+
+    assert core.download_from_youtube(["https://youtu.be/fail"], download_dir=tmp_path) == []
+    assert seen_kwargs["stdout"] is subprocess.DEVNULL
+    assert seen_kwargs["stderr"] is subprocess.PIPE
+    assert "ERROR: Video unavailable" in caplog.text
+
+
 def test_download_from_youtube_empty_input():
     assert core.download_from_youtube([]) == []
 
@@ -293,7 +911,7 @@ def test_download_from_youtube_empty_input():
 def test_download_from_youtube_reports_missing_file(tmp_path, monkeypatch, caplog):
     caplog.set_level("ERROR")
 
-    def fake_run(cmd, check):
+    def fake_run(cmd, check, **_kwargs):
         Path(cmd[cmd.index("--output") + 1]).parent.mkdir(parents=True, exist_ok=True)
 
     monkeypatch.setattr(core.subprocess, "run", fake_run)
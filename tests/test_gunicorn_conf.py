@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-import importlib.util
+import types
 from pathlib import Path
 
+CONF_PATH = Path(__file__).resolve().parents[1] / "gunicorn.conf.py"
+# Compiled once; each load executes it into a fresh module namespace.
+CONF_CODE = compile(CONF_PATH.read_text(encoding="utf-8"), str(CONF_PATH), "exec")
+
 
 def load_conf_module(tmp_name: str = "gunicorn_conf_test"):
-    spec = importlib.util.spec_from_file_location(tmp_name, Path("gunicorn.conf.py"))
-    module = importlib.util.module_from_spec(spec)
-    assert spec.loader is not None
-    spec.loader.exec_module(module)  # type: ignore[assignment]
+    module = types.ModuleType(tmp_name)
+    module.__file__ = str(CONF_PATH)
+    exec(CONF_CODE, module.__dict__)
     return module
 
 
@@ -17,16 +20,33 @@ def test_int_env_parsing(monkeypatch, tmp_path):
     assert module._int_env("MISSING", 3) == 3
 
     monkeypatch.setenv("TEST_VALUE", "5")
-    assert module._int_env("TEST_VALUE", 1, minimum=10) == 10
+    assert load_conf_module()._int_env("TEST_VALUE", 1, minimum=10) == 10
 
     monkeypatch.setenv("TEST_VALUE", "")
-    assert module._int_env("TEST_VALUE", 7) == 7
+    assert load_conf_module()._int_env("TEST_VALUE", 7) == 7
 
     monkeypatch.setenv("TEST_VALUE", "None")
-    assert module._int_env("TEST_VALUE", 9, allow_none=True) is None
+    assert load_conf_module()._int_env("TEST_VALUE", 9, allow_none=True) is None
 
     monkeypatch.setenv("TEST_VALUE", "invalid")
-    assert module._int_env("TEST_VALUE", 2) == 2
+    assert load_conf_module()._int_env("TEST_VALUE", 2) == 2
+
+
+def test_int_env_reads_startup_snapshot(monkeypatch):
+    monkeypatch.setenv("TEST_VALUE", "4")
+    module = load_conf_module()
+    assert module._int_env("TEST_VALUE", 1) == 4
+
+    monkeypatch.setenv("TEST_VALUE", "8")
+    assert module._int_env("TEST_VALUE", 1) == 4
+
+
+def test_graceful_timeout_defaults_to_timeout(monkeypatch):
+    monkeypatch.setenv("WEB_TIMEOUT", "120")
+    monkeypatch.delenv("WEB_GRACEFUL_TIMEOUT", raising=False)
+    module = load_conf_module("gunicorn_conf_timeout")
+    assert module.timeout == 120
+    assert module.graceful_timeout == 120
 
 
 def test_max_requests_and_worker_tmp_dir(monkeypatch, tmp_path):
@@ -36,3 +56,19 @@ def test_max_requests_and_worker_tmp_dir(monkeypatch, tmp_path):
     module = load_conf_module("gunicorn_conf_custom")
     assert module.max_requests is None
     assert module.worker_tmp_dir == str(tmp_path / "workers")
+
+
+def test_threads_default_to_gthread_worker(monkeypatch):
+    monkeypatch.delenv("WEB_THREADS", raising=False)
+    module = load_conf_module("gunicorn_conf_threads")
+    assert module.threads == 8
+
+
+def test_bounded_settings_from_specs(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "0")
+    monkeypatch.setenv("WEB_THREADS", "4")
+    monkeypatch.delenv("WEB_TIMEOUT", raising=False)
+    monkeypatch.setenv("WEB_MAX_REQUESTS_JITTER", "-3")
+    module = load_conf_module("gunicorn_conf_specs")
+    assert (module.workers, module.threads, module.timeout) == (1, 4, 600)
+    assert module.max_requests_jitter == 0
@@ -67,10 +67,9 @@ def test_process_sample_video_end_to_end(tmp_path):
     assert len(results) == 1, "Expected exactly one result"
     
     result = results[0]
-    assert result["input"] == str(sample_video)
-    assert "output" in result
+    assert result.input == str(sample_video)
     
-    output_path = Path(result["output"])
+    output_path = Path(result.output)
     assert output_path.exists(), f"Output file not created: {output_path}"
     assert output_path.suffix == ".mp4", "Expected MP4 output for video input"
     assert output_path.stat().st_size > 0, "Output file is empty"
@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import logging
 import sys
+import threading
 from pathlib import Path
 
 import pytest
 
 import streamlit_app
+from salsa_milk_core import ProcessingResult, ensure_directory
+
+
+@pytest.fixture(autouse=True)
+def synchronous_cleanup(monkeypatch):
+    remove_later = streamlit_app._remove_later
+    monkeypatch.setattr(streamlit_app, "_remove_later", lambda paths: remove_later(paths).join())
 
 
 class FakeUpload:
@@ -83,13 +91,45 @@ class FakeStreamlit:
     def success(self, message: str):
         self.success_messages.append(message)
 
-    def download_button(self, label: str, data: bytes, file_name: str, mime: str):
-        self.downloads.append((label, data, file_name, mime))
+    def download_button(self, label: str, data, file_name: str, mime: str):
+        payload = data.read() if hasattr(data, "read") else data
+        self.downloads.append((label, payload, file_name, mime))
 
 
 def test_guess_mime_defaults():
     assert streamlit_app._guess_mime(Path("track.unknown")) == "application/octet-stream"
     assert streamlit_app._guess_mime(Path("track.mp3")) == "audio/mpeg"
+    assert streamlit_app._guess_mime(Path("track.OPUS")) == "audio/ogg"
+    assert streamlit_app._guess_mime(Path("track.aiff")) == "audio/x-aiff"
+
+
+def test_injected_assets_are_parsed_once():
+    rendered = []
+
+    class MarkdownStreamlit:
+        def markdown(self, body: str, unsafe_allow_html: bool = False):
+            rendered.append(body)
+
+    fake_st = MarkdownStreamlit()
+    streamlit_app._inject_css(fake_st, "streamlit_styles.css")
+    streamlit_app._inject_html(fake_st, "streamlit_footer.html", version="1.2.3")
+    streamlit_app._inject_html(fake_st, "streamlit_footer.html", version="4.5.6")
+
+    assert rendered[0].startswith("<style>") and rendered[0].endswith("</style>")
+    assert "1.2.3" in rendered[1] and "4.5.6" in rendered[2]
+    assert streamlit_app._compiled_template("streamlit_footer.html") is (
+        streamlit_app._compiled_template("streamlit_footer.html")
+    )
+
+
+def test_clamp01_bounds_fractions():
+    assert [streamlit_app._clamp01(value) for value in (-0.5, 0.0, 0.25, 1.0, 3.0)] == [
+        0.0,
+        0.0,
+        0.25,
+        1.0,
+        1.0,
+    ]
 
 
 def test_save_uploaded_files(tmp_path):
@@ -98,6 +138,34 @@ def test_save_uploaded_files(tmp_path):
     assert Path(saved[0]).read_bytes() == b"abc"
 
 
+def test_save_uploaded_files_writes_concurrently_in_order(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    writers = set()
+
+    class SlowUpload(FakeUpload):
+        def getbuffer(self):
+            writers.add(threading.current_thread().name)
+            barrier.wait()
+            return super().getbuffer()
+
+    saved = streamlit_app._save_uploaded_files(
+        [SlowUpload("a.mp3", b"a"), SlowUpload("b.mp3", b"b")], tmp_path
+    )
+
+    assert [Path(path).name for path in saved] == ["a.mp3", "b.mp3"]
+    assert [Path(path).read_bytes() for path in saved] == [b"a", b"b"]
+    assert all(name.startswith("salsa-io") for name in writers)
+
+
+def test_save_uploaded_files_keeps_last_duplicate(tmp_path):
+    saved = streamlit_app._save_uploaded_files(
+        [FakeUpload("a.mp3", b"first"), FakeUpload("a.mp3", b"second")], tmp_path
+    )
+
+    assert saved == [tmp_path / "a.mp3"] * 2
+    assert (tmp_path / "a.mp3").read_bytes() == b"second"
+
+
 def test_save_uploaded_files_requires_buffer(tmp_path):
     class InvalidUpload:
         name = "test.mp3"
@@ -110,17 +178,17 @@ def test_process_submission_success(tmp_path):
     upload = FakeUpload("track.mp3", b"abc")
 
     def fake_process(paths, **kwargs):
-        output = Path(kwargs["output_dir"]) / "result.wav"
+        output = ensure_directory(kwargs["output_dir"]) / "result.wav"
         output.write_bytes(b"result")
         callback = kwargs.get("progress_callback")
         if callback:
             callback("prepare", 0.1, "prepare")
             callback("demucs", 0.5, "demucs")
             callback("complete", 1.0, "done")
-        return [{"output": str(output)}]
+        return [ProcessingResult(input=str(paths[0]), output=str(output), id=output.stem)]
 
     def fake_download(urls, download_dir):
-        path = Path(download_dir) / "yt.mp4"
+        path = ensure_directory(download_dir) / "yt.mp4"
         path.write_bytes(b"yt")
         return [str(path)]
 
@@ -135,8 +203,78 @@ def test_process_submission_success(tmp_path):
 
     assert len(results) == 1
     assert results[0].filename == "result.wav"
-    assert results[0].data == b"result"
-    assert not Path(tmp_path / "workdir").exists()
+    assert results[0].path.read_bytes() == b"result"
+    assert not (tmp_path / "workdir" / "uploads").exists()
+    assert tmp_path / "workdir" in streamlit_app._RETAINED_DIRS
+
+    streamlit_app._discard_results(results)
+    assert not (tmp_path / "workdir").exists()
+    assert tmp_path / "workdir" not in streamlit_app._RETAINED_DIRS
+
+
+def test_remove_later_deletes_on_a_background_thread(tmp_path, monkeypatch):
+    monkeypatch.undo()
+    release = threading.Event()
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    rmtree = streamlit_app.shutil.rmtree
+
+    def slow_rmtree(path, **kwargs):
+        release.wait(5)
+        rmtree(path, **kwargs)
+
+    monkeypatch.setattr(streamlit_app.shutil, "rmtree", slow_rmtree)
+
+    thread = streamlit_app._remove_later([scratch])
+    assert scratch.exists()
+
+    release.set()
+    thread.join(5)
+    assert not scratch.exists()
+
+
+def test_discard_retained_removes_undiscarded_outputs(tmp_path, monkeypatch):
+    work_dir = tmp_path / "workdir"
+    (work_dir / "output").mkdir(parents=True)
+    monkeypatch.setattr(streamlit_app, "_RETAINED_DIRS", {work_dir})
+
+    streamlit_app._discard_retained()
+
+    assert not work_dir.exists()
+    assert not streamlit_app._RETAINED_DIRS
+
+
+def test_process_submission_downloads_while_saving_uploads(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+
+    class SlowUpload(FakeUpload):
+        def getbuffer(self):
+            barrier.wait()
+            return super().getbuffer()
+
+    def fake_download(urls, download_dir):
+        barrier.wait()
+        path = ensure_directory(download_dir) / "yt.mp4"
+        path.write_bytes(b"yt")
+        return [str(path)]
+
+    def fake_process(paths, **kwargs):
+        assert [Path(path).name for path in paths] == ["track.mp3", "yt.mp4"]
+        output = ensure_directory(kwargs["output_dir"]) / "result.wav"
+        output.write_bytes(b"result")
+        return [ProcessingResult(input=str(paths[0]), output=str(output), id=output.stem)]
+
+    results = streamlit_app._process_submission(
+        [SlowUpload("track.mp3", b"abc")],
+        "https://youtu.be/demo",
+        "htdemucs",
+        process_func=fake_process,
+        download_func=fake_download,
+        workdir_factory=lambda prefix: str(tmp_path / "workdir"),
+    )
+
+    assert [result.filename for result in results] == ["result.wav"]
+    streamlit_app._discard_results(results)
 
 
 def test_process_submission_reports_progress(tmp_path):
@@ -144,14 +282,14 @@ def test_process_submission_reports_progress(tmp_path):
     notifications = []
 
     def fake_process(paths, **kwargs):
-        output = Path(kwargs["output_dir"]) / "result.wav"
+        output = ensure_directory(kwargs["output_dir"]) / "result.wav"
         output.write_bytes(b"result")
         callback = kwargs.get("progress_callback")
         if callback:
             callback("prepare", 0.1, "prepare")
             callback("demucs", 0.5, "demucs")
             callback("complete", 1.0, "done")
-        return [{"output": str(output)}]
+        return [ProcessingResult(input=str(paths[0]), output=str(output), id=output.stem)]
 
     streamlit_app._process_submission(
         [upload],
@@ -200,6 +338,28 @@ def test_process_submission_without_results(tmp_path):
         )
 
 
+def test_process_submission_skips_downloads_without_urls(tmp_path):
+    def fail_download(*_args, **_kwargs):  # pragma: no cover - must not be called
+        raise AssertionError("download_func called without URLs")
+
+    def fake_process(paths, **kwargs):
+        output = ensure_directory(kwargs["output_dir"]) / "result.wav"
+        output.write_bytes(b"result")
+        return [ProcessingResult(input=str(paths[0]), output=str(output), id=output.stem)]
+
+    results = streamlit_app._process_submission(
+        [FakeUpload("track.mp3", b"abc")],
+        "",
+        "htdemucs",
+        process_func=fake_process,
+        download_func=fail_download,
+        workdir_factory=lambda prefix: str(tmp_path / "workdir"),
+    )
+
+    assert [result.filename for result in results] == ["result.wav"]
+    streamlit_app._discard_results(results)
+
+
 def test_process_submission_requires_any_inputs(tmp_path, monkeypatch):
     upload = FakeUpload("track.mp3", b"abc")
 
@@ -215,12 +375,20 @@ def test_process_submission_requires_any_inputs(tmp_path, monkeypatch):
         )
 
 
-def test_run_streamlit_flow(monkeypatch):
+def test_run_streamlit_flow(monkeypatch, tmp_path):
     fake_st = FakeStreamlit()
-
-    result = streamlit_app.DownloadableResult(
-        filename="song.wav", data=b"data", mime="audio/wav"
-    )
+    fake_st.session_state = {}
+    previous = tmp_path / "previous" / "output" / "old.wav"
+    previous.parent.mkdir(parents=True)
+    previous.write_bytes(b"old")
+    fake_st.session_state[streamlit_app._RESULTS_KEY] = [
+        streamlit_app.DownloadableResult(filename="old.wav", path=previous, mime="audio/wav")
+    ]
+
+    output = tmp_path / "work" / "output" / "song.wav"
+    output.parent.mkdir(parents=True)
+    output.write_bytes(b"data")
+    result = streamlit_app.DownloadableResult(filename="song.wav", path=output, mime="audio/wav")
 
     monkeypatch.setattr(
         streamlit_app,
@@ -230,9 +398,35 @@ def test_run_streamlit_flow(monkeypatch):
 
     streamlit_app.run(fake_st)
 
-    assert fake_st.downloads
+    assert [download[2] for download in fake_st.downloads] == ["song.wav"]
     assert fake_st.success_messages
     assert fake_st.progress_updates
+    assert fake_st.session_state[streamlit_app._RESULTS_KEY] == [result]
+    assert not (tmp_path / "previous").exists()
+    assert output.exists()
+
+
+def test_run_streamlit_coalesces_progress_ticks(monkeypatch, tmp_path):
+    fake_st = FakeStreamlit()
+    output = tmp_path / "work" / "output" / "song.wav"
+    output.parent.mkdir(parents=True)
+    output.write_bytes(b"data")
+
+    def fake_submission(*_args, progress_callback, **_kwargs):
+        progress_callback("prepare", 0.05, "Preparing workspace...")
+        for percent in range(100):
+            progress_callback("demucs", 0.35 + percent / 200, f"Demucs {percent}%")
+        progress_callback("complete", 1.0, "Processing complete!")
+        return [streamlit_app.DownloadableResult("song.wav", output, "audio/wav")]
+
+    monkeypatch.setattr(streamlit_app, "_process_submission", fake_submission)
+
+    streamlit_app.run(fake_st)
+
+    texts = [text for _value, text in fake_st.progress_updates]
+    assert texts[:3] == ["Preparing to process media...", "Preparing workspace...", "Demucs 0%"]
+    assert len(texts) < 10
+    assert texts[-2:] == ["Processing complete!", "Processing complete!"]
 
 
 def test_run_streamlit_handles_value_error(monkeypatch):
@@ -1,19 +1,70 @@
 from __future__ import annotations
 
+import dataclasses
 import io
+import json
 import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
 
 import pytest
 
 werkzeug_exceptions = pytest.importorskip("werkzeug.exceptions")
 RequestEntityTooLarge = werkzeug_exceptions.RequestEntityTooLarge
+URLSafeTimedSerializer = pytest.importorskip("itsdangerous").URLSafeTimedSerializer
 
 import webapp
+from salsa_milk_core import ProcessingResult
 
 
 def test_allowed_file_extension_checks():
     assert webapp.allowed_file("track.mp3")
     assert not webapp.allowed_file("track.txt")
+    assert webapp.allowed_file("archive.tar.MP3")
+    assert not webapp.allowed_file("mp3")
+
+
+def test_validate_upload_name_sanitizes_allowed_names():
+    assert webapp.validate_upload_name("../my song.MP3") == "my_song.MP3"
+    assert webapp.validate_upload_name("notes.txt") is None
+    assert webapp.validate_upload_name("..mp3") is None
+
+
+@pytest.mark.parametrize("raw", ["", "  ", "invalid"])
+def test_env_number_falls_back_to_default(monkeypatch, caplog, raw):
+    monkeypatch.setenv("SALSA_MILK_TEST_VALUE", raw)
+    caplog.set_level(logging.WARNING, logger="salsa-milk")
+
+    assert webapp._env_number("SALSA_MILK_TEST_VALUE", 2, minimum=1) == 2
+    assert ("SALSA_MILK_TEST_VALUE" in caplog.text) == (raw == "invalid")
+
+
+def test_env_number_clamps_to_minimum(monkeypatch):
+    monkeypatch.setenv("SALSA_MILK_TEST_VALUE", "0")
+    assert webapp._env_number("SALSA_MILK_TEST_VALUE", 2, minimum=1) == 1
+    monkeypatch.delenv("SALSA_MILK_TEST_VALUE")
+    assert webapp._env_number("SALSA_MILK_TEST_VALUE", None, minimum=1) is None
+
+
+def test_import_tolerates_empty_settings():
+    env = {
+        **os.environ,
+        "SALSA_MILK_WORKERS": "",
+        "SALSA_MILK_MAX_INFLIGHT": "",
+        "SALSA_MILK_TASK_TTL": "1h",
+        "SALSA_MILK_GPU_SLOTS": "one",
+    }
+    subprocess.run(
+        [sys.executable, "-c", "import webapp"],
+        cwd=os.path.dirname(webapp.__file__),
+        env=env,
+        check=True,
+    )
 
 
 def build_app():
@@ -22,6 +73,13 @@ def build_app():
     return app
 
 
+def test_create_app_reads_x_sendfile_setting(monkeypatch):
+    assert not webapp.create_app().config["USE_X_SENDFILE"]
+
+    monkeypatch.setenv("USE_X_SENDFILE", "1")
+    assert webapp.create_app().config["USE_X_SENDFILE"]
+
+
 def test_get_request_serves_form(monkeypatch):
     app = build_app()
     client = app.test_client()
@@ -30,20 +88,36 @@ def test_get_request_serves_form(monkeypatch):
     assert b"Upload" in response.data
 
 
-class ImmediateThread:
-    def __init__(self, target=None, args=None, kwargs=None, daemon=None):
-        self._target = target
-        self._args = args or ()
-        self._kwargs = kwargs or {}
+def test_index_is_cached_until_a_message_is_flashed():
+    app = build_app()
+    client = app.test_client()
+    etag = client.get("/").headers["ETag"]
+
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
 
-    def start(self):
-        if self._target:
-            self._target(*self._args, **self._kwargs)
+    with client.session_transaction() as session:
+        session["_flashes"] = [("error", "Too large")]
+    flashed = client.get("/", headers={"If-None-Match": etag})
+    assert flashed.status_code == 200
+    assert b"Too large" in flashed.data
+    assert b"Too large" not in client.get("/").data
+
+
+class ImmediateExecutor:
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class ParkedExecutor:
+    def submit(self, fn, *args, **kwargs):
+        return Future()
 
 
 def clear_tasks():
     with webapp._TASK_LOCK:  # type: ignore[attr-defined]
-        task_ids = list(webapp._TASKS.keys())  # type: ignore[attr-defined]
+        task_ids = tuple(webapp._TASKS)  # type: ignore[attr-defined]
 
     for task_id in task_ids:
         webapp._finalize_task(task_id)  # type: ignore[attr-defined]
@@ -78,10 +152,10 @@ def test_successful_processing(monkeypatch, tmp_path):
         if progress:
             progress("prepare", 0.1, "Preparing file")
             progress("demucs", 0.5, "Demucs 50%")
-        return [{"output": str(output_file)}]
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
 
     monkeypatch.setattr(webapp, "process_files", fake_process)
-    monkeypatch.setattr(webapp.threading, "Thread", ImmediateThread)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
 
     data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
     response = client.post("/api/process", data=data, content_type="multipart/form-data")
@@ -94,13 +168,539 @@ def test_successful_processing(monkeypatch, tmp_path):
     assert progress["download_ready"]
     assert "Demucs" in progress["message"]
 
-    download = client.get(f"/api/download/{task_id}")
+    download = client.get(f"/api/download/{progress['download_token']}")
     assert download.status_code == 200
     assert download.data == b"audio"
 
     clear_tasks()
 
 
+def test_ranged_downloads_keep_the_task(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+
+    def fake_process(paths, **kwargs):
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
+
+    monkeypatch.setattr(webapp, "process_files", fake_process)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    task_id = client.post(
+        "/api/process", data=data, content_type="multipart/form-data"
+    ).get_json()["task_id"]
+    token = client.get(f"/api/progress/{task_id}").get_json()["download_token"]
+
+    partial = client.get(f"/api/download/{token}", headers={"Range": "bytes=0-1"})
+    assert partial.status_code == 206
+    assert partial.data == b"au"
+    partial.close()
+    assert task_id in webapp._TASKS
+
+    clear_tasks()
+
+
+def test_download_rejects_forged_tokens(monkeypatch, tmp_path):
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+    app = build_app()
+    client = app.test_client()
+    secret = tmp_path / "secret.txt"
+    secret.write_text("private")
+    forged = URLSafeTimedSerializer("salsa-milk-secret", salt="salsa-milk-download").dumps(
+        {"t": "x", "p": str(secret), "n": "secret.txt"}
+    )
+
+    assert client.get(f"/api/download/{forged}").status_code == 404
+    assert client.get(f"/api/download/{'0' * 32}").status_code == 404
+
+
+def test_download_uses_x_accel_redirect_when_configured(monkeypatch):
+    monkeypatch.setenv("X_ACCEL_REDIRECT_PREFIX", "/_protected/")
+    app = build_app()
+    client = app.test_client()
+    output_dir = webapp._work_root() / "accel"  # type: ignore[attr-defined]
+    output_dir.mkdir(exist_ok=True)
+    output_file = output_dir / "my result.wav"
+    output_file.write_bytes(b"audio")
+
+    def fake_process(paths, **kwargs):
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
+
+    monkeypatch.setattr(webapp, "process_files", fake_process)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    task_id = client.post(
+        "/api/process", data=data, content_type="multipart/form-data"
+    ).get_json()["task_id"]
+    token = client.get(f"/api/progress/{task_id}").get_json()["download_token"]
+    download = client.get(f"/api/download/{token}")
+
+    assert download.status_code == 200
+    assert "X-Sendfile" not in download.headers
+    assert download.headers["X-Accel-Redirect"] == (
+        f"/_protected/{webapp._work_root().name}/accel/my%20result.wav"  # type: ignore[attr-defined]
+    )
+    assert download.data == b""
+
+    clear_tasks()
+
+
+def test_demucs_runs_hold_a_gpu_slot(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    slots = threading.BoundedSemaphore(1)
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+    held = []
+
+    def fake_process(paths, **kwargs):
+        held.append(not slots.acquire(blocking=False))
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
+
+    monkeypatch.setattr(webapp, "_DEMUCS_SLOTS", slots)
+    monkeypatch.setattr(webapp, "process_files", fake_process)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    client.post("/api/process", data=data, content_type="multipart/form-data")
+
+    assert held == [True]
+    assert slots.acquire(blocking=False)
+
+    clear_tasks()
+
+
+def test_rapid_progress_updates_are_coalesced(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+    messages = []
+
+    def fake_process(paths, **kwargs):
+        progress = kwargs["progress_callback"]
+        (task,) = webapp._TASKS.values()  # type: ignore[attr-defined]
+        for stage, fraction, message in [
+            ("demucs", 0.5, "first"),
+            ("demucs", 0.501, "dropped"),
+            ("demucs", 0.6, "advanced"),
+            ("file_complete", 1.0, "done"),
+        ]:
+            progress(stage, fraction, message)
+            messages.append(task.state.message)
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
+
+    monkeypatch.setattr(webapp, "process_files", fake_process)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    client.post("/api/process", data=data, content_type="multipart/form-data")
+
+    assert messages == ["first", "first", "advanced", "done"]
+
+    clear_tasks()
+
+
+def test_tasks_run_on_shared_worker_pool(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+    workers = []
+    finished = threading.Event()
+
+    def fake_process(paths, **_kwargs):
+        workers.append(threading.current_thread().name)
+        finished.set()
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
+
+    monkeypatch.setattr(webapp, "process_files", fake_process)
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    task_id = response.get_json()["task_id"]
+    assert finished.wait(5)
+
+    deadline = time.monotonic() + 5
+    while client.get(f"/api/progress/{task_id}").get_json()["status"] != "completed":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert workers[0].startswith("salsa-milk-task")
+    clear_tasks()
+
+
+def test_failed_upload_saves_release_the_slot(monkeypatch):
+    app = build_app()
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+    store_upload = webapp._store_upload
+    roots_before = set(webapp._work_root().iterdir())
+
+    def full_disk(_upload, _target):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(webapp, "_store_upload", full_disk)
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+
+    assert response.status_code == 500
+    assert not webapp._TASKS
+    assert set(webapp._work_root().iterdir()) == roots_before
+
+    monkeypatch.setattr(webapp, "_store_upload", store_upload)
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+
+    clear_tasks()
+    webapp._CLEANUP_QUEUE.join()
+
+
+def test_busy_rejections_do_not_spool_the_upload(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(webapp, "_INFLIGHT", slots)
+    assert slots.acquire(blocking=False)
+    spooled = []
+    monkeypatch.setattr(
+        webapp._UploadRequest,
+        "_get_file_stream",
+        lambda *args, **kwargs: spooled.append(args) or io.BytesIO(),
+    )
+    body = b"x" * (webapp._MEMORY_SPOOL_SIZE + 1)
+
+    data = {"file": (io.BytesIO(body), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+
+    assert response.status_code == 429
+    assert not spooled
+    assert not list(webapp._work_root().glob("upload-*"))
+    slots.release()
+
+
+def test_rejected_uploads_release_the_slot(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+
+    response = client.post("/api/process", data={}, content_type="multipart/form-data")
+    assert response.status_code == 400
+    data = {"file": (io.BytesIO(b"abc"), "payload.txt")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+
+    clear_tasks()
+    webapp._CLEANUP_QUEUE.join()
+
+
+def test_large_uploads_are_linked_from_the_spool_file(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+    monkeypatch.setattr(webapp.FileStorage, "save", None)
+    body = b"x" * (webapp._MEMORY_SPOOL_SIZE + 1)  # type: ignore[attr-defined]
+
+    data = {"file": (io.BytesIO(body), "payload.mp3")}
+    task_id = client.post(
+        "/api/process", data=data, content_type="multipart/form-data"
+    ).get_json()["task_id"]
+    saved_path = webapp._TASKS[task_id].saved_path  # type: ignore[attr-defined]
+
+    assert saved_path.read_bytes() == body
+    assert not list(webapp._work_root().glob("upload-*"))  # type: ignore[attr-defined]
+
+    clear_tasks()
+    webapp._CLEANUP_QUEUE.join()  # type: ignore[attr-defined]
+
+
+def test_post_rejects_uploads_when_busy(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    assert response.status_code == 429
+    assert response.get_json()["error"] == "busy"
+    assert response.headers["Retry-After"] == "30"
+
+    clear_tasks()
+
+
+def test_finished_tasks_release_slots_and_expire(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+    monkeypatch.setattr(webapp, "process_files", lambda *_args, **_kwargs: [])
+
+    task_ids = []
+    for _ in range(2):
+        data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+        response = client.post("/api/process", data=data, content_type="multipart/form-data")
+        assert response.status_code == 200
+        task_ids.append(response.get_json()["task_id"])
+
+    work_dir = webapp._TASKS[task_ids[0]].work_dir
+    webapp._sweep_expired_tasks(now=time.time() + webapp._TASK_TTL + 1)
+
+    assert not set(task_ids) & set(webapp._TASKS)
+    webapp._CLEANUP_QUEUE.join()
+    assert not work_dir.exists()
+
+
+def make_finished_task(tmp_path, task_id, created_at, **state):
+    return webapp.ProcessingTask(
+        id=task_id,
+        work_dir=tmp_path / task_id,
+        saved_path=tmp_path / "in.mp3",
+        model="htdemucs",
+        temp_dir=tmp_path,
+        output_dir=tmp_path,
+        state=webapp.TaskState(**state),
+        created_at=created_at,
+    )
+
+
+def test_failed_tasks_expire_before_completed_ones(monkeypatch, tmp_path):
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+    now = time.time()
+    tasks = {
+        "failed": make_finished_task(tmp_path, "failed", now, status="error", finished_at=now),
+        "completed": make_finished_task(
+            tmp_path,
+            "completed",
+            now,
+            status="completed",
+            output_path=output_file,
+            finished_at=now,
+        ),
+    }
+    monkeypatch.setattr(webapp, "_TASKS", tasks)
+
+    webapp._sweep_expired_tasks(now=now + webapp._ERROR_TTL + 1)
+
+    assert set(webapp._TASKS) == {"completed"}
+    webapp._CLEANUP_QUEUE.join()
+
+
+def test_long_running_tasks_expire_from_when_they_finished(monkeypatch, tmp_path):
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+    now = time.time()
+    # Both jobs ran for longer than the TTL and finished just now.
+    started = now - 2 * webapp._TASK_TTL
+    tasks = {
+        "failed": make_finished_task(tmp_path, "failed", started, status="running"),
+        "completed": make_finished_task(tmp_path, "completed", started, status="running"),
+    }
+    monkeypatch.setattr(webapp, "_TASKS", tasks)
+    webapp._publish(tasks["failed"], status="error", error="boom")
+    webapp._publish(tasks["completed"], status="completed", output_path=output_file)
+
+    webapp._sweep_expired_tasks(now=now + 1)
+    assert set(webapp._TASKS) == {"failed", "completed"}
+
+    webapp._sweep_expired_tasks(now=now + webapp._ERROR_TTL + 1)
+    assert set(webapp._TASKS) == {"completed"}
+
+    webapp._sweep_expired_tasks(now=now + webapp._TASK_TTL + 1)
+    assert not webapp._TASKS
+    webapp._CLEANUP_QUEUE.join()
+
+
+def test_only_roots_of_dead_workers_are_removed(monkeypatch, tmp_path):
+    monkeypatch.setattr(webapp.tempfile, "tempdir", str(tmp_path))
+    finished = subprocess.run(
+        [sys.executable, "-c", "import os; print(os.getpid())"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    dead = tmp_path / f"{webapp._WORK_ROOT_PREFIX}{finished.stdout.strip()}-abc"
+    sibling = tmp_path / f"{webapp._WORK_ROOT_PREFIX}{os.getppid()}-abc"
+    own = tmp_path / f"{webapp._WORK_ROOT_PREFIX}{os.getpid()}-abc"
+    legacy = tmp_path / f"{webapp._WORK_ROOT_PREFIX}old"
+    other = tmp_path / "salsa-milk-streamlit-old"
+    for root in (dead, sibling, own, legacy, other):
+        (root / "task").mkdir(parents=True)
+
+    webapp._remove_stale_roots(now=time.time() + webapp._TASK_TTL)
+    webapp._CLEANUP_QUEUE.join()
+    assert not dead.exists()
+    assert sibling.exists() and own.exists() and legacy.exists()
+
+    webapp._remove_stale_roots(now=time.time() + 2 * webapp._TASK_TTL + 1)
+    webapp._CLEANUP_QUEUE.join()
+    assert not legacy.exists()
+    assert sibling.exists() and own.exists() and other.exists()
+
+
+def test_large_uploads_recreate_a_removed_work_root(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+    # A sibling worker's sweep (or a temp cleaner) removes this worker's root.
+    shutil.rmtree(webapp._work_root())
+    body = b"x" * (webapp._MEMORY_SPOOL_SIZE + 1)
+
+    data = {"file": (io.BytesIO(body), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+
+    assert response.status_code == 200
+    saved_path = webapp._TASKS[response.get_json()["task_id"]].saved_path
+    assert saved_path.read_bytes() == body
+
+    clear_tasks()
+    webapp._CLEANUP_QUEUE.join()
+
+
+def test_progress_updates_do_not_take_registry_lock(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    output_file = tmp_path / "result.wav"
+    output_file.write_bytes(b"audio")
+
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_registry_lock():
+        with webapp._TASK_LOCK:
+            held.set()
+            release.wait(timeout=5)
+
+    def fake_process(paths, **kwargs):
+        # Updates are lock-free snapshot swaps, so one goes through while
+        # another thread holds the registry lock.
+        holder = threading.Thread(target=hold_registry_lock)
+        holder.start()
+        assert held.wait(timeout=5)
+        try:
+            kwargs["progress_callback"]("demucs", 0.5, "Demucs 50%")
+            assert webapp._TASK_LOCK.locked()
+        finally:
+            release.set()
+            holder.join()
+        return [ProcessingResult(input=str(paths[0]), output=str(output_file), id="song")]
+
+    monkeypatch.setattr(webapp, "process_files", fake_process)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    response = client.post("/api/process", data=data, content_type="multipart/form-data")
+    progress = client.get(f"/api/progress/{response.get_json()['task_id']}").get_json()
+
+    assert progress["status"] == "completed"
+    clear_tasks()
+
+
+def test_progress_is_published_as_frozen_snapshots(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    task_id = client.post(
+        "/api/process", data=data, content_type="multipart/form-data"
+    ).get_json()["task_id"]
+    task = webapp._TASKS[task_id]
+    queued = task.state
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        queued.status = "running"  # type: ignore[misc]
+
+    webapp._publish(task, status="running", progress=40.0)
+    progress = client.get(f"/api/progress/{task_id}").get_json()
+
+    assert (queued.status, queued.progress) == ("queued", 5.0)
+    assert (progress["status"], progress["progress"]) == ("running", 40.0)
+    clear_tasks()
+
+
+def test_progress_body_is_valid_json():
+    state = webapp.TaskState(status="running", progress=12.3456, message='Say "hi" \u266a')
+
+    assert json.loads(webapp._progress_body(state, None)) == {
+        "status": "running",
+        "progress": 12.35,
+        "message": 'Say "hi" \u266a',
+        "error": None,
+        "download_ready": False,
+    }
+    assert json.loads(webapp._progress_body(state, "abc.def"))["download_token"] == "abc.def"
+
+
+def test_progress_revalidates_with_etags(monkeypatch):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_INFLIGHT", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(webapp, "_EXECUTOR", ParkedExecutor())
+
+    data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+    task_id = client.post(
+        "/api/process", data=data, content_type="multipart/form-data"
+    ).get_json()["task_id"]
+    first = client.get(f"/api/progress/{task_id}")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    unchanged = client.get(f"/api/progress/{task_id}", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b""
+
+    webapp._publish(webapp._TASKS[task_id], status="running", progress=40.0)
+    changed = client.get(f"/api/progress/{task_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    clear_tasks()
+
+
+def test_tasks_share_one_work_root(monkeypatch, tmp_path):
+    app = build_app()
+    client = app.test_client()
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
+    monkeypatch.setattr(webapp, "process_files", lambda *_args, **_kwargs: [])
+
+    work_dirs = []
+    for _ in range(2):
+        data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
+        response = client.post("/api/process", data=data, content_type="multipart/form-data")
+        task_id = response.get_json()["task_id"]
+        work_dirs.append(webapp._TASKS[task_id].work_dir)
+        assert work_dirs[-1].name == task_id
+        assert sorted(path.name for path in work_dirs[-1].iterdir()) == [
+            "output",
+            "payload.mp3",
+            "temp",
+        ]
+
+    assert work_dirs[0].parent == work_dirs[1].parent == webapp._work_root()
+    clear_tasks()
+    assert webapp._work_root().is_dir()
+
+
 def test_processing_failure(monkeypatch, tmp_path):
     app = build_app()
     client = app.test_client()
@@ -109,7 +709,7 @@ def test_processing_failure(monkeypatch, tmp_path):
         raise RuntimeError("boom")
 
     monkeypatch.setattr(webapp, "process_files", fake_process)
-    monkeypatch.setattr(webapp.threading, "Thread", ImmediateThread)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
 
     data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
     response = client.post("/api/process", data=data, content_type="multipart/form-data")
@@ -127,7 +727,7 @@ def test_post_without_results(monkeypatch):
     client = app.test_client()
 
     monkeypatch.setattr(webapp, "process_files", lambda *_args, **_kwargs: [])
-    monkeypatch.setattr(webapp.threading, "Thread", ImmediateThread)
+    monkeypatch.setattr(webapp, "_EXECUTOR", ImmediateExecutor())
 
     data = {"file": (io.BytesIO(b"abc"), "payload.mp3")}
     response = client.post("/api/process", data=data, content_type="multipart/form-data")
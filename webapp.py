@@ -8,25 +8,38 @@ tracking, and download delivery.
 
 from __future__ import annotations
 
+import atexit
+import hashlib
+import json
 import logging
 import os
+import queue
+import secrets
 import shutil
 import tempfile
 import threading
 import time
-import uuid
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import IO, Callable, Dict
+from urllib.parse import quote
 
-from flask import Flask, flash, jsonify, redirect, render_template, request, send_file, url_for
+from flask import Flask, Request, flash, jsonify, redirect, render_template, request, send_file
+from flask import session, url_for
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.datastructures import FileStorage
 from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
 
 from salsa_milk_core import process_files
 
 
-ALLOWED_EXTENSIONS = {
+logger = logging.getLogger("salsa-milk")
+
+ALLOWED_EXTENSIONS = frozenset({
     "mp3",
     "wav",
     "ogg",
@@ -39,11 +52,33 @@ ALLOWED_EXTENSIONS = {
     "avi",
     "mkv",
     "webm",
-}
+})
 AVAILABLE_MODELS = ["htdemucs"]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class TaskState:
+    """Immutable snapshot of a task's progress, replaced wholesale on change.
+    
+    Attributes:
+        status: Current task status ("queued", "running", "completed", "error").
+        progress: Progress percentage (0.0 to 100.0).
+        message: Human-readable status message.
+        error: Error message if processing failed.
+        output_path: Path to final output file (set on completion).
+        download_name: Suggested filename for download.
+        finished_at: ``time.time()`` when the task completed or failed.
+    """
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = "Queued for processing..."
+    error: str | None = None
+    output_path: Path | None = None
+    download_name: str | None = None
+    finished_at: float | None = None
+
+
+@dataclass(slots=True)
 class ProcessingTask:
     """State machine for an in-flight processing request.
     
@@ -51,18 +86,16 @@ class ProcessingTask:
     through processing to download readiness.
     
     Attributes:
-        id: Unique task identifier (UUID hex).
+        id: Unique task identifier (32 random hex digits).
         work_dir: Temporary working directory for this task.
         saved_path: Path to uploaded input file.
         model: Demucs model name to use.
         temp_dir: Temporary directory for intermediate files.
         output_dir: Directory for final output files.
-        status: Current task status ("queued", "running", "completed", "error").
-        progress: Progress percentage (0.0 to 100.0).
-        message: Human-readable status message.
-        output_path: Path to final output file (set on completion).
-        download_name: Suggested filename for download.
-        error: Error message if processing failed.
+        state: Latest published progress snapshot. Only the task's worker
+            replaces it (``process_files`` serializes its progress
+            callbacks), and rebinding one attribute is atomic in CPython, so
+            neither writers nor readers need a lock.
         created_at: Timestamp when task was created.
     """
     id: str
@@ -71,17 +104,207 @@ class ProcessingTask:
     model: str
     temp_dir: Path
     output_dir: Path
-    status: str = "queued"
-    progress: float = 0.0
-    message: str = "Queued for processing..."
-    output_path: Path | None = None
-    download_name: str | None = None
-    error: str | None = None
+    state: TaskState = field(default_factory=TaskState)
     created_at: float = field(default_factory=time.time)
 
 
+def _env_number(
+    name: str,
+    default: float | None,
+    *,
+    minimum: float,
+    parse: Callable[[str], float] = int,
+) -> float | None:
+    """Read a numeric setting from the environment, tolerating bad values.
+    
+    Settings are read at import time, when an exception would crash-loop
+    every worker, so empty or unparsable values fall back to ``default``
+    (with a warning for the latter), as in ``gunicorn.conf.py``.
+    
+    Args:
+        name: Environment variable to read.
+        default: Value used when the variable is unset, empty or invalid.
+        minimum: Lower bound applied to parsed values.
+        parse: Converter for the raw string (``int`` or ``float``).
+        
+    Returns:
+        The parsed value clamped to ``minimum``, or ``default``.
+    """
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+
+    try:
+        value = parse(raw)
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r; using %s", name, raw, default)
+        return default
+
+    return max(value, minimum)
+
+
 _TASKS: Dict[str, ProcessingTask] = {}
+# Single ``get``/``pop``/``__setitem__`` calls on ``_TASKS`` are atomic under the
+# CPython GIL, so lookups take no lock; this must be revisited for free-threaded
+# builds. The lock only serialises registration against the expiry sweep.
 _TASK_LOCK = threading.Lock()
+# Long-lived workers for Demucs jobs; uploads beyond the pool size wait queued.
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=_env_number("SALSA_MILK_WORKERS", 2, minimum=1),
+    thread_name_prefix="salsa-milk-task",
+)
+# Optional cap on concurrent Demucs runs (e.g. one per GPU) below the pool size.
+_DEMUCS_SLOT_COUNT = _env_number("SALSA_MILK_GPU_SLOTS", None, minimum=1)
+_DEMUCS_SLOTS = (
+    threading.BoundedSemaphore(_DEMUCS_SLOT_COUNT) if _DEMUCS_SLOT_COUNT is not None else None
+)
+# Uploads admitted but not yet processed; further uploads get HTTP 429.
+_INFLIGHT = threading.BoundedSemaphore(_env_number("SALSA_MILK_MAX_INFLIGHT", 8, minimum=1))
+# Seconds a finished task's output is kept for download before it is swept.
+_TASK_TTL = _env_number("SALSA_MILK_TASK_TTL", 3600.0, minimum=0.0, parse=float)
+# Failed tasks have nothing to download, so they are swept sooner.
+_ERROR_TTL = min(300.0, _TASK_TTL)
+# Seconds between background sweeps, so idle workers still free expired tasks.
+_REAP_INTERVAL = 60.0
+# Prefix of per-worker work roots in the system temporary directory.
+_WORK_ROOT_PREFIX = "salsa-milk-web-"
+# Copy buffer for saving uploads; Werkzeug's default is 16 KiB.
+_UPLOAD_CHUNK_SIZE = 1 << 20
+# Requests up to this size keep their file parts in memory, as in Werkzeug.
+_MEMORY_SPOOL_SIZE = 500 * 1024
+# Progress updates within one stage are coalesced unless they advance by at
+# least this fraction or arrive this many seconds after the last one.
+_PROGRESS_STEP = 0.005
+_PROGRESS_INTERVAL = 0.1
+# Work directories of finalized tasks, deleted by the janitor thread.
+_CLEANUP_QUEUE: "queue.Queue[Path]" = queue.Queue()
+
+
+@lru_cache(maxsize=1)
+def _claim_work_root() -> Path:
+    """Create this worker process's work root on first use.
+    
+    The name carries the worker's PID so that other workers can tell a
+    live sibling's root from one left behind by a crashed process.
+    
+    Returns:
+        Path to the worker's temporary root directory.
+    """
+    _remove_stale_roots()
+    root = Path(tempfile.mkdtemp(prefix=f"{_WORK_ROOT_PREFIX}{os.getpid()}-"))
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    return root
+
+
+def _work_root() -> Path:
+    """Return this worker process's parent directory for task work dirs.
+    
+    Created on first use, so it belongs to the process that serves the
+    requests, and removed when that process exits: its tasks live only in
+    this process's ``_TASKS`` and cannot be downloaded afterwards. If the
+    directory was removed from under the worker, it is recreated.
+    
+    Returns:
+        Path to the worker's temporary root directory.
+    """
+    root = _claim_work_root()
+    if not root.is_dir():
+        root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process with ``pid`` still exists.
+    
+    Args:
+        pid: Process identifier to probe.
+        
+    Returns:
+        True if the process exists (even if owned by another user).
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_stale_roots(now: float | None = None) -> None:
+    """Queue work roots left behind by dead workers for deletion.
+    
+    Roots are named after their worker's PID and are only removed once that
+    process is gone, so idle sibling workers keep theirs. Roots without a
+    PID in the name are removed when untouched for twice ``_TASK_TTL``.
+    
+    Args:
+        now: Current ``time.time()`` value (defaults to the real clock).
+    """
+    cutoff = (time.time() if now is None else now) - 2 * _TASK_TTL
+
+    for root in Path(tempfile.gettempdir()).glob(f"{_WORK_ROOT_PREFIX}*"):
+        owner = root.name[len(_WORK_ROOT_PREFIX):].partition("-")[0]
+        try:
+            if not root.is_dir():
+                continue
+            if owner.isdigit():
+                stale = int(owner) != os.getpid() and not _pid_alive(int(owner))
+            else:
+                stale = root.stat().st_mtime < cutoff
+        except OSError:
+            continue
+
+        if stale:
+            _start_janitor()
+            _CLEANUP_QUEUE.put(root)
+
+
+class _UploadRequest(Request):
+    """Request that spools large file parts into this worker's work root.
+    
+    Werkzeug spools them to an anonymous temporary file that ``save`` then
+    copies; a named file on the same filesystem can be hard-linked into the
+    task directory instead (see ``_store_upload``).
+    """
+
+    def _get_file_stream(
+        self,
+        total_content_length: int | None,
+        content_type: str | None,
+        filename: str | None = None,
+        content_length: int | None = None,
+    ) -> IO[bytes]:
+        if total_content_length is None or total_content_length > _MEMORY_SPOOL_SIZE:
+            return tempfile.NamedTemporaryFile(
+                "wb+", buffering=_UPLOAD_CHUNK_SIZE, prefix="upload-", dir=_work_root()
+            )
+        return super()._get_file_stream(
+            total_content_length, content_type, filename, content_length
+        )
+
+
+def _store_upload(upload: FileStorage, target: Path) -> None:
+    """Place an uploaded file at ``target``, linking its spool file if possible.
+    
+    The spool file is still removed when the request closes; the link keeps
+    the data, so large uploads are written to disk only once.
+    
+    Args:
+        upload: Uploaded file from the request.
+        target: Destination path inside the task's upload directory.
+    """
+    spool_name = getattr(upload.stream, "name", None)
+
+    if isinstance(spool_name, str):
+        try:
+            upload.stream.flush()
+            os.link(spool_name, target)
+            return
+        except OSError:
+            pass
+
+    upload.save(target, buffer_size=_UPLOAD_CHUNK_SIZE)
 
 
 def allowed_file(filename: str) -> bool:
@@ -93,35 +316,110 @@ def allowed_file(filename: str) -> bool:
     Returns:
         True if file extension is in ALLOWED_EXTENSIONS, False otherwise.
     """
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+    return "." in filename and filename.rpartition(".")[2].lower() in ALLOWED_EXTENSIONS
+
+
+def _accel_redirect_uri(prefix: str, path: Path) -> str:
+    """Map a work file onto nginx's internal location for temporary files.
+    
+    Args:
+        prefix: Internal location that aliases the system temporary directory.
+        path: Absolute path of the file to serve.
+        
+    Returns:
+        URI for the ``X-Accel-Redirect`` header.
+    """
+    relative = path.resolve().relative_to(Path(tempfile.gettempdir()).resolve())
+    return f"{prefix}/{quote(relative.as_posix())}"
+
+
+def validate_upload_name(raw: str) -> str | None:
+    """Sanitize an uploaded filename if its extension is allowed.
+    
+    The extension is checked on the raw name first, so rejected uploads skip
+    ``secure_filename``'s Unicode normalization.
+    
+    Args:
+        raw: Filename as sent by the client.
+        
+    Returns:
+        Sanitized filename, or None if the file type is not allowed.
+    """
+    if not allowed_file(raw):
+        return None
+
+    filename = secure_filename(raw)
+    # Sanitizing can strip the name down to a bare extension (e.g. "..mp3").
+    return filename if allowed_file(filename) else None
 
 
 def create_app() -> Flask:
     """Create and configure the Flask application.
     
     Sets up routes, error handlers, and logging configuration.
-    Configures maximum upload size from environment variable.
+    Configures maximum upload size and X-Sendfile support from environment
+    variables.
     
     Returns:
         Configured Flask application instance.
     """
     app = Flask(__name__)
+    app.request_class = _UploadRequest
     app.secret_key = os.environ.get("SECRET_KEY", "salsa-milk-secret")
     app.config["MAX_CONTENT_LENGTH"] = int(
         os.environ.get("MAX_CONTENT_LENGTH", 512 * 1024 * 1024)
     )
+    # Behind a proxy that honours X-Sendfile, hand downloads to it instead of
+    # streaming them through the Python worker.
+    app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+    # nginx does the same via X-Accel-Redirect to an ``internal`` location
+    # that maps this prefix onto the system temporary directory.
+    accel_prefix = os.environ.get("X_ACCEL_REDIRECT_PREFIX", "").rstrip("/")
+    if accel_prefix:
+        app.config["USE_X_SENDFILE"] = True
+
+    # Download tokens carry the output path, so they are never signed with the
+    # public default secret; without SECRET_KEY each worker uses a random key.
+    download_tokens = URLSafeTimedSerializer(
+        os.environ.get("SECRET_KEY") or secrets.token_bytes(32),
+        salt="salsa-milk-download",
+    )
+
+    # Validation errors are constant, so serialize their bodies only once.
+    no_file_body = app.json.dumps(
+        {"error": "no_file", "message": "Please choose a media file to upload."}
+    )
+    invalid_type_body = app.json.dumps(
+        {
+            "error": "invalid_type",
+            "message": "Unsupported file type. Please upload audio or video media.",
+        }
+    )
+
+    def _json_error(body: str, status: int = 400):
+        """Build a fresh JSON error response from a pre-serialized body.
+        
+        Args:
+            body: Serialized JSON payload.
+            status: HTTP status code.
+            
+        Returns:
+            JSON response with the given status.
+        """
+        return app.response_class(f"{body}\n", status=status, mimetype="application/json")
 
     if not logging.getLogger().handlers:
         logging.basicConfig(level=logging.INFO)
 
-    logger = logging.getLogger("salsa-milk")
-
-    @app.route("/", methods=["GET"])
-    def index():
-        """Render the main upload form page.
+    def render_index() -> str:
+        """Render the upload form with any pending flashed messages.
         
         Returns:
-            Rendered HTML template with upload form.
+            Rendered HTML for the main page.
         """
         return render_template(
             "index.html",
@@ -129,64 +427,112 @@ def create_app() -> Flask:
             max_size=app.config["MAX_CONTENT_LENGTH"],
         )
 
+    @lru_cache(maxsize=1)
+    def cached_index() -> tuple[bytes, str]:
+        """Render the flash-free upload form once.
+        
+        Returns:
+            Encoded page and its ETag.
+        """
+        body = render_index().encode("utf-8")
+        return body, hashlib.blake2b(body, digest_size=8).hexdigest()
+
+    @app.route("/", methods=["GET"])
+    def index():
+        """Render the main upload form page.
+        
+        Without flashed messages the page never changes, so it is served from
+        a cache and revalidated by ETag.
+        
+        Returns:
+            HTML response with the upload form, or 304 if unchanged.
+        """
+        if "_flashes" in session:
+            return render_index()
+
+        body, etag = cached_index()
+        response = app.response_class(body, mimetype="text/html")
+        response.set_etag(etag)
+        # Revalidate so a redirect carrying a flash is never hidden by the cache.
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
     @app.post("/api/process")
     def api_process():
         """Handle file upload and initiate async processing.
         
-        Validates uploaded file, creates processing task, and starts
-        background thread for processing.
+        Validates uploaded file, creates processing task, and submits it to
+        the background worker pool.
         
         Returns:
             JSON response with task_id and status (200 on success).
             JSON error response (400) if validation fails.
+            JSON error response (429) if too many uploads are already in flight.
         """
-        upload = request.files.get("file")
-        if not upload or upload.filename == "":
-            return jsonify({"error": "no_file", "message": "Please choose a media file to upload."}), 400
-
-        filename = secure_filename(upload.filename)
-        if not allowed_file(filename):
-            return (
-                jsonify(
-                    {
-                        "error": "invalid_type",
-                        "message": "Unsupported file type. Please upload audio or video media.",
-                    }
-                ),
-                400,
+        # Admission comes first: touching ``request.files`` or ``request.form``
+        # parses (and spools) the whole body, which a rejected upload must not cost.
+        _start_reaper()
+        _sweep_expired_tasks()
+        if not _INFLIGHT.acquire(blocking=False):
+            response = jsonify(
+                {
+                    "error": "busy",
+                    "message": "The server is busy processing other uploads. Please retry shortly.",
+                }
             )
+            response.headers["Retry-After"] = "30"
+            return response, 429
 
-        model = request.form.get("model", "htdemucs") or "htdemucs"
-
-        work_dir = Path(tempfile.mkdtemp(prefix="salsa-milk-"))
-        uploads_dir = work_dir / "uploads"
+        # Anyone holding the id can poll for the download token, so it keeps
+        # 128 random bits.
+        task_id = secrets.token_hex(16)
+        work_dir = _work_root() / task_id
         temp_dir = work_dir / "temp"
         output_dir = work_dir / "output"
 
-        uploads_dir.mkdir(parents=True, exist_ok=True)
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        saved_path = uploads_dir / filename
-        upload.save(saved_path)
-
-        task_id = uuid.uuid4().hex
-        task = ProcessingTask(
-            id=task_id,
-            work_dir=work_dir,
-            saved_path=saved_path,
-            model=model,
-            temp_dir=temp_dir,
-            output_dir=output_dir,
-            progress=5.0,
-            message="Upload complete. Preparing to process...",
-        )
+        # Until the task is handed to the pool, any failure must give back the
+        # slot and the work directory, or the worker slowly stops accepting.
+        try:
+            upload = request.files.get("file")
+            if not upload or upload.filename == "":
+                _INFLIGHT.release()
+                return _json_error(no_file_body)
+
+            filename = validate_upload_name(upload.filename)
+            if filename is None:
+                _INFLIGHT.release()
+                return _json_error(invalid_type_body)
+
+            model = request.form.get("model", "htdemucs") or "htdemucs"
+
+            # ``parents`` creates the task directory; the upload sits beside
+            # ``temp`` and ``output`` (its name keeps a suffix).
+            temp_dir.mkdir(parents=True)
+            output_dir.mkdir()
+
+            saved_path = work_dir / filename
+            _store_upload(upload, saved_path)
+
+            task = ProcessingTask(
+                id=task_id,
+                work_dir=work_dir,
+                saved_path=saved_path,
+                model=model,
+                temp_dir=temp_dir,
+                output_dir=output_dir,
+                state=TaskState(progress=5.0, message="Upload complete. Preparing to process..."),
+            )
 
-        with _TASK_LOCK:
-            _TASKS[task_id] = task
+            with _TASK_LOCK:
+                _TASKS[task_id] = task
 
-        thread = threading.Thread(target=_run_task, args=(task_id,), daemon=True)
-        thread.start()
+            future = _EXECUTOR.submit(_run_task, task_id)
+        except BaseException:
+            _TASKS.pop(task_id, None)
+            shutil.rmtree(work_dir, ignore_errors=True)
+            _INFLIGHT.release()
+            raise
+        future.add_done_callback(lambda _future: _INFLIGHT.release())
 
         response = jsonify({"task_id": task_id, "status": "queued"})
         response.headers["Cache-Control"] = "no-store"
@@ -196,61 +542,98 @@ def create_app() -> Flask:
     def api_progress(task_id: str):
         """Get current progress for a processing task.
         
+        Each published state gets a weak ETag, so polls that revalidate with
+        ``If-None-Match`` receive an empty 304 until the task moves on.
+        
         Args:
             task_id: Unique task identifier.
             
         Returns:
-            JSON response with status, progress, message, and download_ready flag.
+            JSON response with status, progress, message, and download_ready flag,
+            or 304 if the client already has the current state.
             
         Raises:
             NotFound: If task_id does not exist.
         """
-        with _TASK_LOCK:
-            task = _TASKS.get(task_id)
+        task = _TASKS.get(task_id)
 
         if task is None:
             raise NotFound()
 
-        payload = {
-            "status": task.status,
-            "progress": round(task.progress, 2),
-            "message": task.message,
-            "error": task.error,
-            "download_ready": bool(task.output_path and task.status == "completed"),
-        }
-        return jsonify(payload)
+        state = task.state
+        etag = f"{hash(state) & 0xFFFFFFFFFFFFFFFF:x}"
+
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
 
-    @app.get("/api/download/<task_id>")
-    def api_download(task_id: str):
+        token = None
+        if state.output_path and state.status == "completed":
+            token = download_tokens.dumps(
+                {"t": task_id, "p": str(state.output_path), "n": state.download_name}
+            )
+
+        response = app.response_class(_progress_body(state, token), mimetype="application/json")
+        response.set_etag(etag, weak=True)
+        # Revalidate on every poll rather than refusing to cache at all.
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.get("/api/download/<token>")
+    def api_download(token: str):
         """Download the processed output file for a task.
         
-        Automatically cleans up task data after download completion.
+        The signed token from ``api_progress`` names the output file, so no
+        task lookup is needed. ``Range`` requests are honoured so interrupted
+        downloads can resume. Task data is cleaned up once the whole file has
+        been streamed from here; partial, conditional and proxy-served
+        responses leave it to the expiry sweep instead.
         
         Args:
-            task_id: Unique task identifier.
+            token: Signed download token issued with the task's progress.
             
         Returns:
             File download response with processed audio/video.
             
         Raises:
-            NotFound: If task doesn't exist or output file is not available.
+            NotFound: If the token is invalid or expired, or the output file is
+                not available.
         """
-        with _TASK_LOCK:
-            task = _TASKS.get(task_id)
+        try:
+            payload = download_tokens.loads(token, max_age=_TASK_TTL)
+        except BadSignature:
+            raise NotFound() from None
+
+        # The token already holds the path as a string; stat it directly.
+        output_path: str = payload["p"]
 
-        if task is None or task.output_path is None or not task.output_path.exists():
+        if not os.path.isfile(output_path):
             raise NotFound()
 
         response = send_file(
-            task.output_path,
+            output_path,
             as_attachment=True,
-            download_name=task.download_name or task.output_path.name,
+            download_name=payload["n"] or os.path.basename(output_path),
+            conditional=True,
         )
 
+        if accel_prefix:
+            del response.headers["X-Sendfile"]
+            response.headers["X-Accel-Redirect"] = _accel_redirect_uri(
+                accel_prefix, Path(output_path)
+            )
+
+        # A proxy reads the file only after this response closes, and a ranged
+        # response may be followed by requests for the rest of the file.
+        if response.status_code != 200 or app.config["USE_X_SENDFILE"]:
+            return response
+
         @response.call_on_close
         def _cleanup_task() -> None:
             """Clean up task data after download completes."""
-            _finalize_task(task_id)
+            _finalize_task(payload["t"])
 
         return response
 
@@ -273,28 +656,48 @@ def create_app() -> Flask:
 app = create_app()
 
 
-def _default_message(stage: str, file_name: str) -> str:
-    """Generate default progress message for a processing stage.
+def _progress_body(state: TaskState, download_token: str | None) -> str:
+    """Serialize a progress poll response without building a payload dict.
+    
+    Only the free-form message and error need JSON escaping; the download
+    token is URL-safe base64 and needs none.
+    
+    Args:
+        state: Task state snapshot to report.
+        download_token: Signed download token once the output is ready.
+        
+    Returns:
+        JSON object with status, progress, message, error and download_ready,
+        plus download_token when ready.
+    """
+    token = f',"download_token":"{download_token}"' if download_token else ""
+    return (
+        f'{{"status":{json.dumps(state.status)},"progress":{round(state.progress, 2)!r},'
+        f'"message":{json.dumps(state.message)},"error":{json.dumps(state.error)},'
+        f'"download_ready":{"true" if download_token else "false"}{token}}}\n'
+    )
+
+
+def _stage_messages(file_name: str) -> Dict[str, str]:
+    """Build the default progress messages for each processing stage.
     
     Args:
-        stage: Processing stage identifier.
         file_name: Name of file being processed.
         
     Returns:
-        Human-readable progress message.
+        Mapping from stage identifier to human-readable progress message.
     """
-    stage_messages = {
+    return {
         "prepare": f"Preparing {file_name}...",
         "convert": f"Converting {file_name}...",
         "demucs": f"Running Demucs on {file_name}...",
         "mux": f"Writing {file_name}...",
         "file_complete": f"Completed {file_name}.",
     }
-    return stage_messages.get(stage, "Processing...")
 
 
 def _run_task(task_id: str) -> None:
-    """Execute processing for a task in background thread.
+    """Execute processing for a task on a background worker.
     
     Updates task progress through callbacks and handles errors.
     Sets final status to "completed" on success or "error" on failure.
@@ -302,87 +705,191 @@ def _run_task(task_id: str) -> None:
     Args:
         task_id: Unique task identifier.
     """
-    with _TASK_LOCK:
-        task = _TASKS.get(task_id)
+    task = _TASKS.get(task_id)
 
     if task is None:
         return
 
-    logger = logging.getLogger("salsa-milk")
+    stage_messages = _stage_messages(task.saved_path.name)
+    last_stage: str | None = None
+    last_fraction = 0.0
+    last_update = 0.0
 
     def update(stage: str, fraction: float, message: str | None) -> None:
         """Update task progress.
         
+        Small, rapid updates within one stage are dropped; clients poll
+        ``/api/progress`` far less often than Demucs reports.
+        
         Args:
             stage: Processing stage identifier.
             fraction: Progress fraction (0.0 to 1.0).
             message: Optional progress message.
         """
-        with _TASK_LOCK:
-            current = _TASKS.get(task_id)
-            if current is None:
-                return
-            current.status = "running"
-            current.progress = max(current.progress, fraction * 100)
-            current.message = message or _default_message(stage, current.saved_path.name)
+        nonlocal last_stage, last_fraction, last_update
+        now = time.monotonic()
+        if (
+            stage == last_stage
+            and stage != "file_complete"
+            and fraction - last_fraction < _PROGRESS_STEP
+            and now - last_update < _PROGRESS_INTERVAL
+        ):
+            return
 
-    try:
-        results = process_files(
-            [task.saved_path],
-            model=task.model,
-            temp_dir=task.temp_dir,
-            output_dir=task.output_dir,
-            enable_progress=False,
-            progress_callback=update,
+        last_stage, last_fraction, last_update = stage, fraction, now
+        state = task.state
+        task.state = replace(
+            state,
+            status="running",
+            progress=max(state.progress, fraction * 100),
+            message=message or stage_messages.get(stage, "Processing..."),
         )
+
+    try:
+        with _DEMUCS_SLOTS or nullcontext():
+            results = process_files(
+                [task.saved_path],
+                model=task.model,
+                temp_dir=task.temp_dir,
+                output_dir=task.output_dir,
+                enable_progress=False,
+                progress_callback=update,
+            )
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.exception("Processing failed: %s", exc)
-        with _TASK_LOCK:
-            current = _TASKS.get(task_id)
-            if current is not None:
-                current.status = "error"
-                current.message = "Processing failed. Please try again."
-                current.error = str(exc)
+        _publish(
+            task,
+            status="error",
+            message="Processing failed. Please try again.",
+            error=str(exc),
+        )
         return
 
     if not results:
-        with _TASK_LOCK:
-            current = _TASKS.get(task_id)
-            if current is not None:
-                current.status = "error"
-                current.message = "No output was produced. Please try a different file."
-                current.error = "no_output"
+        _publish(
+            task,
+            status="error",
+            message="No output was produced. Please try a different file.",
+            error="no_output",
+        )
         return
 
-    output_path = Path(results[0]["output"])
+    output_path = Path(results[0].output)
     download_name = f"{task.saved_path.stem}_vocals{output_path.suffix}"
 
+    _publish(
+        task,
+        status="completed",
+        progress=100.0,
+        message="Demucs separation complete! Preparing download...",
+        output_path=output_path,
+        download_name=download_name,
+    )
+
+
+def _publish(task: ProcessingTask, **changes) -> None:
+    """Replace ``task.state`` with a copy carrying ``changes``.
+    
+    Must only be called from the task's worker, its sole writer. Moving to
+    "completed" or "error" stamps ``finished_at``, which expiry counts from.
+    
+    Args:
+        task: Task whose state to update.
+        **changes: ``TaskState`` fields to change.
+    """
+    if changes.get("status") in ("completed", "error"):
+        changes.setdefault("finished_at", time.time())
+    task.state = replace(task.state, **changes)
+
+
+def _sweep_expired_tasks(now: float | None = None) -> None:
+    """Finalize finished tasks whose output outlived ``_TASK_TTL``.
+    
+    Queued and running tasks are never swept; only completed ones that
+    were not downloaded in time, and failed ones after ``_ERROR_TTL``.
+    Both are measured from when the task finished, not when it was created.
+    
+    Args:
+        now: Current ``time.time()`` value (defaults to the real clock).
+    """
+    now = time.time() if now is None else now
+    cutoffs = {"completed": now - _TASK_TTL, "error": now - _ERROR_TTL}
     with _TASK_LOCK:
-        current = _TASKS.get(task_id)
-        if current is None:
-            return
-        current.status = "completed"
-        current.progress = 100.0
-        current.message = "Demucs separation complete! Preparing download..."
-        current.output_path = output_path
-        current.download_name = download_name
+        snapshot = tuple(_TASKS.items())
+
+    expired = [
+        task_id
+        for task_id, task in snapshot
+        if task.state.finished_at is not None
+        and task.state.finished_at < cutoffs.get(task.state.status, float("-inf"))
+    ]
+
+    for task_id in expired:
+        _finalize_task(task_id)
+
+
+@lru_cache(maxsize=1)
+def _start_reaper() -> threading.Thread:
+    """Start this worker's periodic expiry sweep on first use.
+    
+    Returns:
+        The running daemon thread.
+    """
+
+    def reap() -> None:
+        while True:
+            time.sleep(_REAP_INTERVAL)
+            try:
+                _sweep_expired_tasks()
+            except Exception:  # pragma: no cover - keep sweeping
+                logger.exception("Expired task sweep failed")
+
+    thread = threading.Thread(target=reap, name="salsa-milk-reaper", daemon=True)
+    thread.start()
+    return thread
 
 
 def _finalize_task(task_id: str) -> None:
     """Clean up task resources and remove from tracking.
     
-    Deletes temporary working directory and removes task from registry.
+    Removes the task from the registry and queues its working directory
+    for deletion by the janitor thread.
     
     Args:
         task_id: Unique task identifier.
     """
-    with _TASK_LOCK:
-        task = _TASKS.pop(task_id, None)
+    task = _TASKS.pop(task_id, None)
 
     if task is None:
         return
 
-    shutil.rmtree(task.work_dir, ignore_errors=True)
+    _start_janitor()
+    _CLEANUP_QUEUE.put(task.work_dir)
+
+
+@lru_cache(maxsize=1)
+def _start_janitor() -> threading.Thread:
+    """Start this worker's cleanup thread on first use.
+    
+    Deleting a work directory full of Demucs stems can take a while, so
+    ``_finalize_task`` only queues it; a download response can then close
+    without waiting for the ``rmtree``.
+    
+    Returns:
+        The running daemon thread.
+    """
+
+    def drain() -> None:
+        while True:
+            work_dir = _CLEANUP_QUEUE.get()
+            try:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            finally:
+                _CLEANUP_QUEUE.task_done()
+
+    thread = threading.Thread(target=drain, name="salsa-milk-janitor", daemon=True)
+    thread.start()
+    return thread
 
 
 if __name__ == "__main__":  # pragma: no cover - Flask entry point